@@ -19,6 +19,9 @@ import numpy as np
 
 _LOG = logs.getLogger("gamma")
 
+# Matches the (first) scene date in a SLC par file name
+_SCENE_DATE_RE = re.compile("[0-9]{8}")
+
 
 class SlcParFileParser:
     def __init__(self, par_file: Path,) -> None:
@@ -154,7 +157,7 @@ class BaselineProcess:
 
         slc_dates = []
         for par in self.slc_par_list:
-            dt_str = re.findall("[0-9]{8}", Path(par).stem)[0]
+            dt_str = _SCENE_DATE_RE.findall(Path(par).stem)[0]
             slc_dates.append(datetime.datetime.strptime(dt_str, "%Y%m%d").date())
         return sorted(slc_dates, reverse=False)
 
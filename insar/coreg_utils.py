@@ -1,3 +1,4 @@
+import bisect
 import datetime
 import geopandas
 import os
@@ -254,65 +255,51 @@ def find_scenes_in_range(primary_dt, date_list, thres_days: int, include_closest
     """
 
     # We do everything with datetime.date's (can't mix and match date vs. datetime)
+    sorted_dates = sorted(standardise_to_date(dt) for dt in date_list)
+
+    return _find_sorted_scenes_in_range(primary_dt, sorted_dates, thres_days, include_closest)
+
+
+def _find_sorted_scenes_in_range(
+    primary_dt,
+    sorted_dates: List[datetime.date],
+    thres_days: int,
+    include_closest: bool = True
+):
+    """
+    The implementation of `find_scenes_in_range` for a list of dates that has
+    already been standardised to `datetime.date` and sorted, which allows
+    the threshold window to be found with a binary search.
+    """
     if isinstance(primary_dt, datetime.datetime):
         primary_dt = primary_dt.date()
     elif not isinstance(primary_dt, datetime.date):
         primary_dt = datetime.date(primary_dt)
 
     thresh_dt = datetime.timedelta(days=thres_days)
-    tree_lhs = []  # This was the 'lower' side in the bash...
-    tree_rhs = []  # This was the 'upper' side in the bash...
-    closest_lhs = None
-    closest_rhs = None
-    closest_lhs_diff = None
-    closest_rhs_diff = None
-
-    for dt in date_list:
-        if isinstance(dt, datetime.datetime):
-            dt = dt.date()
-        elif isinstance(dt, str):
-            dt = datetime.datetime.strptime(dt, SCENE_DATE_FMT).date()
-        elif not isinstance(primary_dt, datetime.date):
-            dt = datetime.date(dt)
-
-        dt_diff = dt - primary_dt
-
-        # Skip scenes that match the primary date
-        if dt_diff.days == 0:
-            continue
-
-        # Record closest scene
-        if dt_diff < datetime.timedelta(0):
-            is_closer = closest_lhs is None or dt_diff > closest_lhs_diff
-
-            if is_closer:
-                closest_lhs = dt
-                closest_lhs_diff = dt_diff
-        else:
-            is_closer = closest_rhs is None or dt_diff < closest_rhs_diff
 
-            if is_closer:
-                closest_rhs = dt
-                closest_rhs_diff = dt_diff
+    # Scenes that match the primary date are skipped, so the scenes either side
+    # of the primary date are split around the range of primary dates.
+    primary_lo = bisect.bisect_left(sorted_dates, primary_dt)
+    primary_hi = bisect.bisect_right(sorted_dates, primary_dt, lo=primary_lo)
 
-        # Skip scenes outside threshold window
-        if abs(dt_diff) > thresh_dt:
-            continue
+    window_lo = bisect.bisect_left(sorted_dates, primary_dt - thresh_dt, hi=primary_lo)
+    window_hi = bisect.bisect_right(sorted_dates, primary_dt + thresh_dt, lo=primary_hi)
 
-        if dt_diff < datetime.timedelta(0):
-            tree_lhs.append(dt)
-        else:
-            tree_rhs.append(dt)
+    tree_lhs = sorted_dates[window_lo:primary_lo]  # This was the 'lower' side in the bash...
+    tree_rhs = sorted_dates[primary_hi:window_hi]  # This was the 'upper' side in the bash...
 
     # Use closest scene if none are in threshold window
     if include_closest:
-        if len(tree_lhs) == 0 and closest_lhs is not None:
+        if len(tree_lhs) == 0 and primary_lo > 0:
+            closest_lhs = sorted_dates[primary_lo - 1]
             LOG.info(
                 f"Date difference to closest secondary greater than {thres_days} days, using closest secondary only: {closest_lhs}"
             )
             tree_lhs = [closest_lhs]
 
-        if len(tree_rhs) == 0 and closest_rhs is not None:
+        if len(tree_rhs) == 0 and primary_hi < len(sorted_dates):
+            closest_rhs = sorted_dates[primary_hi]
             LOG.info(
                 f"Date difference to closest secondary greater than {thres_days} days, using closest secondary only: {closest_rhs}"
             )
@@ -346,21 +333,25 @@ def create_secondary_coreg_tree(primary_dt, date_list, thres_days=63):
     # I've opted for rhs vs. lhs because it's more obvious, newer scenes are to the right
     # in sequence as they're greater than, older scenes are to the left / less than.
 
+    # The dates are searched many times while building the tree, so we only
+    # standardise and sort them once up-front.
+    sorted_dates = sorted(standardise_to_date(dt) for dt in date_list)
+
     # Initial Primary<->Secondary coreg list
-    lhs, rhs = find_scenes_in_range(primary_dt, date_list, thres_days)
+    lhs, rhs = _find_sorted_scenes_in_range(primary_dt, sorted_dates, thres_days)
     last_list = lhs + rhs
 
     while len(last_list) > 0:
         lists.append(last_list)
 
         if last_list[0] < primary_dt:
-            lhs, rhs = find_scenes_in_range(last_list[0], date_list, thres_days)
+            lhs, rhs = _find_sorted_scenes_in_range(last_list[0], sorted_dates, thres_days)
             sub_list1 = lhs
         else:
             sub_list1 = []
 
         if last_list[-1] > primary_dt:
-            lhs, rhs = find_scenes_in_range(last_list[-1], date_list, thres_days)
+            lhs, rhs = _find_sorted_scenes_in_range(last_list[-1], sorted_dates, thres_days)
             sub_list2 = rhs
         else:
             sub_list2 = []
@@ -398,8 +389,8 @@ def append_secondary_coreg_tree(primary_dt, old_date_lists, new_date_list, thres
     # was in the stack at first (very niche corner case - common in our unit tests though).
     first_tree_dates = []
     first_trees_count = 0
-    for list in old_date_lists:
-        first_tree_dates += list
+    for dates in old_date_lists:
+        first_tree_dates += dates
         first_trees_count += 1
 
         if len(first_tree_dates) >= 2:
@@ -424,7 +415,9 @@ def append_secondary_coreg_tree(primary_dt, old_date_lists, new_date_list, thres
 
     # For each set of new dates, add a new level to the tree
     for new_dates in new_date_lists:
-        new_dates = [standardise_to_date(i) for i in new_dates]
+        # Standardise & sort the new dates once per level, rather than on
+        # every search through them as the tree is extended below.
+        new_dates = sorted(standardise_to_date(i) for i in new_dates)
 
         # Sanity check new dates, we require all new dates within thres_days of
         # each other AND at least one is within thres_days of the latest date
@@ -434,8 +427,13 @@ def append_secondary_coreg_tree(primary_dt, old_date_lists, new_date_list, thres
                 "The provided dates do not contain any that are within thres_dt of the latest date in the coreg tree"
             )
 
-        for date in new_dates:
-            if not any(abs(date - dt) <= thresh_dt for dt in new_dates if dt != date):
+        # As the dates are sorted, the closest other date to each date is one of its
+        # neighbours - so only the gaps between adjacent (unique) dates need checking.
+        unique_dates = sorted(set(new_dates))
+        close_gaps = [(curr - prev) <= thresh_dt for prev, curr in zip(unique_dates, unique_dates[1:])]
+
+        for has_close_prev, has_close_next in zip([False] + close_gaps, close_gaps + [False]):
+            if not (has_close_prev or has_close_next):
                 raise ValueError("The provided dates do not have at least one date within thres_dt of each other")
 
         # Note: This design really works best when we only append new dates 'after' (or before) the whole set
@@ -448,13 +446,13 @@ def append_secondary_coreg_tree(primary_dt, old_date_lists, new_date_list, thres
 
         while len(last_list) > 0:
             if last_list[0] < primary_dt:
-                lhs, rhs = find_scenes_in_range(last_list[0], new_dates, thres_days)
+                lhs, rhs = _find_sorted_scenes_in_range(last_list[0], new_dates, thres_days)
                 sub_list1 = lhs
             else:
                 sub_list1 = []
 
             if last_list[-1] > primary_dt:
-                lhs, rhs = find_scenes_in_range(last_list[-1], new_dates, thres_days)
+                lhs, rhs = _find_sorted_scenes_in_range(last_list[-1], new_dates, thres_days)
                 sub_list2 = rhs
             else:
                 sub_list2 = []
@@ -13,6 +13,9 @@ from insar.meta_data.s1_slc import S1DataDownload, Archive
 from insar.logs import STATUS_LOGGER as LOG
 from insar.project import ProcConfig
 
+# Matches the UUID keys of SLC entries in the query results
+_UUID_RE = re.compile(r"[0-9a-fA-F]{8}\-[0-9a-fA-F]{4}\-[0-9a-fA-F]{4}\-[0-9a-fA-F]{4}\-[0-9a-fA-F]{12}")
+
 
 def _check_frame_bursts(
     primary_df: gpd.GeoDataFrame,
@@ -386,7 +389,6 @@ def slc_inputs(slc_data_input: Dict) -> pd.DataFrame:
         A dataframe with sub-set of queried attributes needed to form SLC.
     """
 
-    _regx_uuid = r"[0-9a-fA-F]{8}\-[0-9a-fA-F]{4}\-[0-9a-fA-F]{4}\-[0-9a-fA-F]{4}\-[0-9a-fA-F]{12}"
     _swath_keys = ["IW1", "IW2", "IW3"]
     _missing_primary_bursts_key = "missing_primary_bursts"
 
@@ -406,6 +408,11 @@ def slc_inputs(slc_data_input: Dict) -> pd.DataFrame:
                                          "url", "total_bursts", "polarization", "acquisition_datetime",
                                          "missing_primary_bursts"])
 
+    # Note: the rows of every burst are gathered in a single walk of the query
+    # results and concatenated once, rather than re-concatenating the whole
+    # dataframe for each burst.
+    burst_rows = [slc_input_df]
+
     for dt in scene_dates:
         for swath in _swath_keys:
             swath_data = slc_data_input[dt][swath]
@@ -413,10 +420,10 @@ def slc_inputs(slc_data_input: Dict) -> pd.DataFrame:
             swath_extent = swath_data["swath_extent"]
 
             for slc_id, slc_val in swath_data.items():
-                if re.match(_regx_uuid, slc_id):
+                if _UUID_RE.match(slc_id):
                     for b in slc_val["burst_number"]:
                         for mb in missing_primary_bursts:
-                            newrow = pd.DataFrame({
+                            burst_rows.append(pd.DataFrame({
                                     "date": dt,
                                     "swath": swath,
                                     "burst_number": b,
@@ -427,7 +434,6 @@ def slc_inputs(slc_data_input: Dict) -> pd.DataFrame:
                                     "polarization": slc_val["polarization"],
                                     "acquisition_datetime": slc_val["acquisition_datetime"],
                                     "missing_primary_bursts": mb
-                                    })
-                            slc_input_df = pd.concat([slc_input_df, newrow], ignore_index=True)
+                                    }))
 
-    return slc_input_df
+    return pd.concat(burst_rows, ignore_index=True)
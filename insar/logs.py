@@ -34,6 +34,7 @@ class ValueRenderer:
 
 
 COMMON_PROCESSORS = (
+    structlog.contextvars.merge_contextvars,
     structlog.threadlocal.merge_threadlocal,
     structlog.processors.CallsiteParameterAdder(
         [
@@ -982,16 +982,6 @@ def do_geocode(
                 ic.ifg_filt_coh_geocode_out_tiff,
             )
 
-    # TF: also remove all binaries and .ras files to save disc space
-    #     keep flat.int since this is currently used as input for stamps processing
-    # FIXME: move paths to dedicated mgmt class
-
-    current = Path(".")
-    all_paths = [tuple(current.glob(pattern)) for pattern in const.TEMP_FILE_GLOBS]
-
-    # for path in all_paths:
-    #    remove_files(*path)
-
 
 def get_width_in(fn: Path) -> int:
     """
@@ -35,6 +35,9 @@ pg = create_gamma_proxy(ProcessSlcException)
 
 PHASE_SHIFT_DATE = datetime.date(2015, 3, 10)
 
+# Matches the acquisition start time in an S1 product identifier
+_START_DATETIME_RE = re.compile("[0-9]{8}T[0-9]{6}")
+
 
 def get_slc_safe_files(raw_data_dir: Path, scene_date: str) -> List[Path]:
     """Returns list of .SAFE file paths need to form full SLC for a date."""
@@ -162,7 +165,7 @@ def read_raw_data(
         metadata[ident] = {"src_url": str(src_url)}
 
         # add start time to dict
-        dt_start = re.findall("[0-9]{8}T[0-9]{6}", ident)[0]
+        dt_start = _START_DATETIME_RE.findall(ident)[0]
         start_datetime = datetime.datetime.strptime(dt_start, "%Y%m%dT%H%M%S")
 
         for swath in [1, 2, 3]:
@@ -242,7 +245,7 @@ def read_raw_data(
 
             for xml_file in save_file.glob(xml_pattern):
                 _, cout, _ = pg.S1_burstloc(Path(xml_file))
-                num_bursts = sum([line.startswith("Burst") for line in cout])
+                num_bursts = sum(line.startswith("Burst") for line in cout)
                 LOG.debug(f"nbursts: {num_bursts} from: {xml_file}")
                 num_subswath_burst += num_bursts
 
@@ -498,7 +501,7 @@ def frame_subset(
     df = pd.read_csv(burst_data, index_col=0)
 
     df[acq_datetime_key] = pd.to_datetime(df[acq_datetime_key])
-    df["date"] = df[acq_datetime_key].apply(lambda x: pd.Timestamp(x).date())
+    df["date"] = df[acq_datetime_key].dt.date
     df_subset = df[(df["date"] == scene_date) & (df["polarization"] == polarisation)]
 
     tabs_param = dict()
@@ -352,6 +352,13 @@ class ProcConfig:
 
         return msg
 
+    def as_dict(self) -> dict:
+        """
+        Returns the settings of this config as a dict keyed by setting name,
+        unset settings having a value of None.
+        """
+        return {name: getattr(self, name, None) for name in self.__slots__}
+
     def save(self, file_obj):
         for name in self.__slots__:
             val_str = ""
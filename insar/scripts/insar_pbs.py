@@ -13,7 +13,6 @@ import click
 import warnings
 import subprocess
 import re
-import geopandas
 from typing import List
 from pathlib import Path
 from os.path import dirname, exists, basename
@@ -70,6 +69,9 @@ package \
 STORAGE = "+gdata/{proj}"
 
 __DATE_FMT__ = "%Y-%m-%d"
+__TRACK_FRAME__ = r"^T[0-9][0-9]?[0-9]?[A|D]_F[0-9][0-9]?"
+
+_TRACK_FRAME_RE = re.compile(__TRACK_FRAME__)
 
 
 def _gen_pbs(
@@ -528,15 +530,13 @@ def ard_insar(
     if shape_file:
         shape_file = Path(shape_file)
 
-        __TRACK_FRAME__ = r"^T[0-9][0-9]?[0-9]?[A|D]_F[0-9][0-9]?"
-
         # TODO: We should make this validation optional (this is specific to our framing definition)
         # - we probably want to define a framing definition as a first-class concept
         # - and allow it to validate extents / stack IDs / etc itself...
 
         # Match <track>_<frame> prefix syntax
         # Note: this doesn't match _<sensor> suffix which is unstructured
-        if not re.match(__TRACK_FRAME__, shape_file.stem):
+        if not _TRACK_FRAME_RE.match(shape_file.stem):
             msg = f"{shape_file.stem} should be of {__TRACK_FRAME__} format"
             fatal_error(msg)
 
@@ -554,16 +554,23 @@ def ard_insar(
         #
         # Note: Ideally we don't get track/frame/sensor from shape file at all,
         # these should be task parameters (still need to validate shape file against that though)
+        #
+        # Note: geopandas (and the geo stack it pulls in) is only imported when
+        # there's a shape file to validate, as it's slow to import.
+        import geopandas
+
         shape_file_dbf = geopandas.GeoDataFrame.from_file(shape_file.with_suffix(".dbf"))
 
-        if hasattr(shape_file_dbf, "frame_ID") and hasattr(shape_file_dbf, "track"):
-            dbf_frames = shape_file_dbf.frame_ID.unique()
-            dbf_tracks = shape_file_dbf.track.unique()
+        if "frame_ID" in shape_file_dbf.columns and "track" in shape_file_dbf.columns:
+            # Note: we only need to know all rows share the same value, which
+            # doesn't need the unique values of the columns to be found.
+            dbf_frames = shape_file_dbf["frame_ID"].values
+            dbf_tracks = shape_file_dbf["track"].values
 
-            if len(dbf_frames) != 1:
+            if len(dbf_frames) == 0 or not (dbf_frames == dbf_frames[0]).all():
                 fatal_error("Supplied shape file contains more than one frame!")
 
-            if len(dbf_tracks) != 1:
+            if len(dbf_tracks) == 0 or not (dbf_tracks == dbf_tracks[0]).all():
                 fatal_error("Supplied shape file contains more than one track!")
 
             if dbf_frames[0].strip().lower() != frame.lower():  # dbf has full TxxD track definition
@@ -727,8 +734,8 @@ def ard_package(
         pbs_resource += "#PBS -M {}".format(email)
 
     with open(input_list, "r") as src:
-        # get a list of shapefiles as Path objects
-        tasklist = [Path(fp.rstrip()) for fp in src.readlines()]
+        # get a list of shapefiles as Path objects (ignoring blank lines)
+        tasklist = [Path(fp.rstrip()) for fp in src if fp.strip()]
 
     pbs_scripts = []
     for shp_task in tasklist:
@@ -78,9 +78,7 @@ def get_s1_files(
         burst_data = pd.read_csv(Path(burst_data).as_posix())
 
     burst_data["acquisition_datetime"] = pd.to_datetime(burst_data["acquisition_datetime"])
-    burst_data["date"] = burst_data["acquisition_datetime"].apply(
-        lambda x: pd.Timestamp(x).date()
-    )
+    burst_data["date"] = burst_data["acquisition_datetime"].dt.date
     _subset_burst_data = burst_data[burst_data["date"] == acquisition_date]
 
     return [s1_zip for s1_zip in _subset_burst_data.url.unique()]
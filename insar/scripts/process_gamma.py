@@ -86,8 +86,5 @@ def run_ard_inline(args: Dict[str, Any]) -> None:
             tasks.pop()
 
 
-if __name__ == "__name__":
-    run()
-
 if __name__ == "__main__":
     run()
@@ -39,7 +39,7 @@ def query_out_dir(dir: Path):
         all_scene_dates = [line.strip() for line in scenes_file]
 
     with (dir / "lists" / "ifgs.list").open("r") as ifgs_file:
-        all_ifg_date_pairs = set([line.strip().replace(",", "-") for line in ifgs_file])
+        all_ifg_date_pairs = {line.strip().replace(",", "-") for line in ifgs_file}
 
     with (dir / "metadata.json").open("r") as metadata_file:
         metadata = json.load(metadata_file)
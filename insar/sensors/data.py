@@ -1,4 +1,5 @@
 import re
+import functools
 from datetime import datetime
 from pathlib import Path
 from typing import List, Optional
@@ -17,6 +18,12 @@ _sensors = {
     tsx.METADATA.constellation_name: tsx,
 }
 
+# Source data name patterns, compiled once as every source data path is identified
+_S1_SOURCE_DATA_RE = re.compile(s1.SOURCE_DATA_PATTERN)
+_RSAT2_SOURCE_DATA_RE = re.compile(rsat2.SOURCE_DATA_PATTERN)
+_PALSAR_SOURCE_DATA_RE = re.compile(palsar.SOURCE_DATA_PATTERN)
+_TSX_SOURCE_DATA_RE = re.compile(tsx.SOURCE_DATA_PATTERN)
+
 
 def identify_data_source(fn: Path):
     """
@@ -31,16 +38,21 @@ def identify_data_source(fn: Path):
     # (eg: Level 0/1 products we may be interested in, like SLC and GRD)
 
     # Turn absolute paths into just the filenames
-    name = str(Path(fn).name)
+    return _identify_data_source_name(str(Path(fn).name))
+
 
+# Note: the same source data names get identified repeatedly (eg: once per
+# task that dispatches on them), so the results are memoised by name.
+@functools.lru_cache(maxsize=4096)
+def _identify_data_source_name(name: str):
     # Check Sentinel-1
-    s1_match = re.match(s1.SOURCE_DATA_PATTERN, name)
+    s1_match = _S1_SOURCE_DATA_RE.match(name)
     if s1_match:
         scene_date = datetime.strptime(s1_match.group("start"), "%Y%m%dT%H%M%S")
         return s1.METADATA.constellation_name, s1_match.group("sensor"), scene_date.strftime(SCENE_DATE_FMT)
 
     # Check RADARSAT-2
-    rsat2_match = re.match(rsat2.SOURCE_DATA_PATTERN, name)
+    rsat2_match = _RSAT2_SOURCE_DATA_RE.match(name)
     if rsat2_match:
         # There is only a single satellite in RSAT2 constellation,
         # so it has a hard-coded sensor name.
@@ -48,13 +60,13 @@ def identify_data_source(fn: Path):
         return rsat2.METADATA.constellation_name, rsat2.METADATA.constellation_members[0], scene_date
 
     # Check ALOS PALSAR
-    palsar_match = re.match(palsar.SOURCE_DATA_PATTERN, name)
+    palsar_match = _PALSAR_SOURCE_DATA_RE.match(name)
     if palsar_match:
         scene_date = palsar_match.group("product_date")
         return palsar.METADATA.constellation_name, palsar_match.group("sensor_id"), scene_date
 
     # Check TSX
-    tsx_match = re.match(tsx.SOURCE_DATA_PATTERN, name)
+    tsx_match = _TSX_SOURCE_DATA_RE.match(name)
     if tsx_match:
         scene_date = tsx_match.group("product_date")
         return tsx.METADATA.constellation_name, tsx_match.group("sensor_id"), scene_date
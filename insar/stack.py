@@ -14,6 +14,9 @@ from insar.sensors import identify_data_source, get_data_swath_info
 from insar.generate_slc_inputs import query_slc_inputs, slc_inputs
 from insar.logs import STATUS_LOGGER as LOG
 
+_DIGITS_RE = re.compile(r"\d+")
+_SCENE_DATE_RE = re.compile(r"\d{8}")
+
 # TODO: We may need to split this up:
 # * query utils should be their own file for sure
 # * some of these functions would be best built on SlcPaths, but SlcPaths depends on some of these functions...
@@ -322,7 +325,7 @@ def resolve_stack_scene_query(
     for query in include_queries:
         # Strings may be a YYYYMMDD date, or a file path
         if isinstance(query, str):
-            if re.match(r"\d{8}", query):
+            if _SCENE_DATE_RE.match(query):
                 query = datetime.datetime.strptime(query, SCENE_DATE_FMT).date()
                 include_dates.append((query,query))
 
@@ -352,11 +355,11 @@ def resolve_stack_scene_query(
             if sensor == "S1":
                 # get the relative orbit number, which is int value of the numeric part of the track name
                 # Note: This is S1 specific...
-                rel_orbit = int(re.findall(r"\d+", str(proc_config.track))[0])
+                rel_orbit = int(_DIGITS_RE.search(str(proc_config.track)).group())
 
                 # Find the maximum extent of the queried dates
                 min_date = include_dates[0][0]
-                max_date = max([d[1] for d in include_dates])
+                max_date = max(d[1] for d in include_dates)
 
                 # Query SLCs that match our search criteria for the maximum span
                 # of dates that covers all of our include dates.
@@ -6,7 +6,7 @@ import luigi.configuration
 import json
 
 from insar.coreg_utils import append_secondary_coreg_tree, load_coreg_tree
-from insar.stack import load_stack_config, load_stack_scene_dates
+from insar.stack import load_stack_scene_dates
 from insar.paths.coregistration import CoregisteredSlcPaths
 from insar.paths.slc import SlcPaths
 from insar.paths.stack import StackPaths
@@ -16,7 +16,7 @@ from insar.sensors import identify_data_source
 from insar.constant import SCENE_DATE_FMT
 from insar.stack import resolve_stack_scene_additional_files
 
-from insar.workflow.luigi.utils import PathParameter, read_primary_date, tdir, get_scenes, read_rlks_alks
+from insar.workflow.luigi.utils import PathParameter, read_primary_date, tdir, get_scenes, read_rlks_alks, load_proc_config
 from insar.workflow.luigi.baseline import BaselineProcess
 from insar.workflow.luigi.coregistration import CoregisterSecondary, get_coreg_kwargs
 from insar.workflow.luigi.backscatter import ProcessBackscatter
@@ -43,7 +43,7 @@ class AppendDatesToStack(luigi.Task):
     orbit = luigi.OptionalParameter()
 
     def output_path(self):
-        proc_config = load_stack_config(self.proc_file)
+        proc_config = load_proc_config(self.proc_file)
         fname = f"{self.stack_id}_append_{self.append_idx}_status.out"
         return tdir(proc_config.job_path) / fname
 
@@ -68,7 +68,7 @@ class AppendDatesToStack(luigi.Task):
 
         # Load stack details
         append_idx = self.append_idx
-        proc_config = load_stack_config(self.proc_file)
+        proc_config = load_proc_config(self.proc_file)
         paths = StackPaths(proc_config)
         append_manifest = paths.list_dir / f"append{append_idx}.manifest"
         append_dates_list = paths.list_dir / f"scenes{append_idx}.list"
@@ -87,9 +87,6 @@ class AppendDatesToStack(luigi.Task):
         ml_file = tdir(paths.job_dir) / f"{self.stack_id}_createmultilook_status_logs.out"
         rlks, alks = read_rlks_alks(ml_file)
 
-        # Load the stack's existing scene data
-        slc_inputs_df = pd.read_csv(paths.acquisition_csv, index_col=0)
-
         # If the new scenes haven't had SLC generated yet, do so...
         # - this gate exists as Luigi w/ runtime dependencies will call run()
         # - once for each yield... thus we don't want to keep querying/appending/validating
@@ -101,6 +98,12 @@ class AppendDatesToStack(luigi.Task):
         append_dates = []
 
         if not append_dates_list.exists():
+            # Load the stack's existing scene data
+            #
+            # Note: this is only needed to set up the append, not when run() is
+            # re-entered after the new scenes' SLCs have been yielded.
+            slc_inputs_df = pd.read_csv(paths.acquisition_csv, index_col=0)
+
             # immediately make a deep copy of it, for validation later on
             original_slc_inputs_df = slc_inputs_df.copy(deep=True)
 
@@ -113,7 +116,8 @@ class AppendDatesToStack(luigi.Task):
                 shape_file
             )
 
-            append_dates = set(slc_inputs_df["date"].unique()) - set(original_slc_inputs_df["date"].unique())
+            is_new_date = ~slc_inputs_df["date"].isin(original_slc_inputs_df["date"])
+            append_dates = slc_inputs_df.loc[is_new_date, "date"].drop_duplicates().sort_values()
             append_dates = [i.strftime(SCENE_DATE_FMT) for i in append_dates]
 
             # Drop duplicates (this is because of how Luigi works, run() is called multiple times w/ dynamic deps being yielded)
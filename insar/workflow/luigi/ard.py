@@ -5,12 +5,14 @@ import luigi.configuration
 import datetime
 import os
 import os.path
+import io
+import re
 from pathlib import Path
 
-from insar.project import ProcConfig, ARDWorkflow
+from insar.project import ARDWorkflow
 from insar.logs import STATUS_LOGGER as LOG
 
-from insar.stack import load_stack_config, load_stack_scenes, resolve_stack_scene_query, load_stack_scene_dates
+from insar.stack import load_stack_scenes, resolve_stack_scene_query, load_stack_scene_dates
 
 from insar.workflow.luigi.stack_setup import InitialSetup
 from insar.workflow.luigi.resume import TriggerResume
@@ -18,7 +20,86 @@ from insar.workflow.luigi.backscatter import CreateCoregisteredBackscatter
 from insar.workflow.luigi.interferogram import CreateProcessIFGs
 from insar.workflow.luigi.backscatter_nrt import CreateNRTBackscatter
 from insar.workflow.luigi.append import AppendDatesToStack
-from insar.workflow.luigi.utils import DateListParameter, PathParameter, simplify_dates, one_day
+from insar.workflow.luigi.utils import DateListParameter, PathParameter, simplify_dates, one_day, load_proc_config
+
+
+# Files (relative to the stack output dir) that are kept when cleaning up a stack,
+# all other files are considered temporary and removed.
+REQUIRED_FILES = [
+    # IFG files
+    "INT/**/*_geo_unw.tif",
+    "INT/**/*_flat_geo_coh.tif",
+    "INT/**/*_flat_geo_int.tif",
+    "INT/**/*_filt_geo_coh.tif",
+    "INT/**/*_filt_geo_int.tif",
+    "INT/**/*_base.par",
+    "INT/**/*_bperp.par",
+    "INT/**/*_geo_unw*.png",
+    "INT/**/*_flat_geo_int.png",
+    "INT/**/*_flat_int",
+
+    # SLC files
+    "SLC/**/r*rlks.mli",
+    "SLC/**/r*rlks.mli.par",
+    "SLC/**/r*.slc.par",
+    "SLC/**/*sigma0*.tif",
+    "SLC/**/*gamma0*.tif",
+    "SLC/**/*sigma0*.png",
+    "SLC/**/*gamma0*.png",
+    "SLC/**/ACCURACY_WARNING",
+
+    # DEM files
+    "DEM/**/*rlks_geo_to_rdc.lt",
+    "DEM/**/*_geo_dem.tif",
+    "DEM/**/*_geo.dem.par",
+    "DEM/**/diff_*rlks.par",
+    "DEM/**/*_geo_lv_phi.tif",
+    "DEM/**/*_geo_lv_theta.tif",
+    "DEM/**/*_rdc.dem",
+    "DEM/**/*lsmap*",
+
+    # Keep all lists, metadata, and top level files
+    "lists/*",
+    "**/metadata*.json",
+    "*"
+]
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """
+    Translates a `pathlib` style glob pattern into an equivalent regex.
+
+    Unlike `fnmatch.translate`, `*` and `?` do not match across directories
+    and `**/` matches zero or more directories (as `Path.glob` does).
+    """
+    parts = re.split(r"(\*\*/|\*|\?)", pattern)
+    tokens = {"**/": "(?:.*/)?", "*": "[^/]*", "?": "[^/]"}
+
+    return "".join(tokens.get(i, re.escape(i)) for i in parts)
+
+
+# Compiled once, matched against posix paths relative to the output dir
+_REQUIRED_FILE_RE = re.compile("|".join(f"(?:{_glob_to_regex(i)})" for i in REQUIRED_FILES))
+
+
+def _iter_files(root: str, rel_root: str = ""):
+    """
+    Recursively yields the (posix path relative to `root`, full path) of every file in a dir.
+
+    Unlike `Path.rglob` this gets the file/dir type of each entry from the directory
+    listing itself, rather than a stat per entry, and doesn't create a `Path` per entry.
+
+    As with `Path.rglob` symlinked dirs are neither walked into nor yielded, and
+    only symlinks need an extra stat to identify what they point to.
+    """
+    with os.scandir(root) as entries:
+        for entry in entries:
+            rel_path = f"{rel_root}{entry.name}"
+
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_files(entry.path, f"{rel_path}/")
+            elif not entry.is_symlink() or not entry.is_dir():
+                yield rel_path, entry.path
 
 
 class ARD(luigi.WrapperTask):
@@ -88,8 +169,8 @@ class ARD(luigi.WrapperTask):
 
         LOG.info(f"Loading config from {self.proc_file}")
 
-        with open(str(self.proc_file), "r") as proc_fileobj:
-            proc_config = ProcConfig.from_file(proc_fileobj)
+        # Note: requires() is called many times, so this is a (cached) copy of the config
+        proc_config = load_proc_config(self.proc_file)
 
         LOG.info(f"Done loading config from {self.proc_file}")
 
@@ -164,7 +245,7 @@ class ARD(luigi.WrapperTask):
 
         LOG.debug(f"Check if this stack already exists (eg: has a config.proc and scenes.list)")
         if proc_file.exists():
-            existing_config = load_stack_config(proc_file)
+            existing_config = load_proc_config(proc_file)
 
             LOG.debug(f"Determine what scenes have already been added to the stack")
             # - this is from prior include date queries + explicit source data
@@ -181,16 +262,22 @@ class ARD(luigi.WrapperTask):
             exclude_date_spec = [(d.date_a, d.date_b + one_day) for d in self.exclude_dates or []]
 
             new_scenes_query = sorted(simplify_dates(include_date_spec, exclude_date_spec))
-            new_scenes, _ = resolve_stack_scene_query(
-                existing_config,
-                new_scenes_query + list(self.source_data),
-                [proc_config.sensor],
-                self.orbit,
-                pols,
-                [self.sensor],
-                Path(self.shape_file) if self.shape_file else None,
-                exclude_imprecise_orbit=self.require_precise_orbit
-            )
+
+            # The scene query only depends on this task's parameters, and requires()
+            # is called many times - so only query the database once per task.
+            if not hasattr(self, '_new_scenes'):
+                self._new_scenes, _ = resolve_stack_scene_query(
+                    existing_config,
+                    new_scenes_query + list(self.source_data),
+                    [proc_config.sensor],
+                    self.orbit,
+                    pols,
+                    [self.sensor],
+                    Path(self.shape_file) if self.shape_file else None,
+                    exclude_imprecise_orbit=self.require_precise_orbit
+                )
+
+            new_scenes = self._new_scenes
 
             # Note: We're actually throwing away information here, by assuming existing dates never get
             # retrospectively updated (eg: database might get an update w/ no-longer-missing/un-corrupted data)
@@ -232,8 +319,8 @@ class ARD(luigi.WrapperTask):
                 # Note: resume works w/ dates, not data... resume could occur due to source data
                 # corruption being fixed (which means source data may indeed be removed / replaced
                 # with a new data file for the same date).
-                existing_dates = set([date for date, _ in existing_scenes])
-                new_dates = set([date for date, _ in new_scenes])
+                existing_dates = {date for date, _ in existing_scenes}
+                new_dates = {date for date, _ in new_scenes}
 
                 added_dates = new_dates - existing_dates
                 removed_dates = existing_dates - (new_dates - added_dates)
@@ -269,22 +356,24 @@ class ARD(luigi.WrapperTask):
 
             assert(existing_config.__slots__ == proc_config.__slots__)
 
+            new_settings = proc_config.as_dict()
+            old_settings = existing_config.as_dict()
+
             conflicts = []
-            for name in proc_config.__slots__:
+            for name, new_val in new_settings.items():
                 # special case for cleanup, which we allow to change
                 if name == "cleanup":
                     continue
 
-                new_val = getattr(proc_config, name)
-                old_val = getattr(existing_config, name)
+                old_val = old_settings[name]
+                new_str = "" if new_val is None else str(new_val)
 
                 # If there's no such new value or it's "auto", inherit old.
-                no_new_val = new_val is None or not str(new_val)
-                if no_new_val or str(new_val) == "auto":
+                if not new_str or new_str == "auto":
                     setattr(proc_config, name, old_val)
 
                 # Otherwise, ensure values match / haven't changed.
-                elif str(new_val) != str(old_val):
+                elif new_str != str(old_val):
                     conflicts.append((name, new_val, old_val))
 
             if conflicts:
@@ -295,8 +384,14 @@ class ARD(luigi.WrapperTask):
         os.makedirs(self.job_path, exist_ok=True)
 
         LOG.debug(f"Save final config w/ any newly supplied or inferred settings.")
-        with open(proc_file, "w") as proc_fileobj:
-            proc_config.save(proc_fileobj)
+        proc_buffer = io.StringIO()
+        proc_config.save(proc_buffer)
+        proc_contents = proc_buffer.getvalue()
+
+        # Note: requires() is called many times, so we only re-write the config if it
+        # has actually changed (which also keeps its mtime for cached config loads)
+        if not proc_file.exists() or proc_file.read_text() != proc_contents:
+            proc_file.write_text(proc_contents)
 
         LOG.debug(f"generate (just once) a unique token for tasks that need to re-run")
         if self.resume:
@@ -304,7 +399,6 @@ class ARD(luigi.WrapperTask):
                 self.resume_token = datetime.datetime.now().strftime("%Y%m%d-%H%M")
 
         LOG.debug(f"Coregistration processing")
-        ard_tasks = []
         self.output_dirs = [self.output_path]
 
         kwargs = {
@@ -337,24 +431,36 @@ class ARD(luigi.WrapperTask):
             return
 
         LOG.debug(f"Yield appropriate workflow")
+        # Only decide on the task class + its parameters here, the luigi task
+        # itself is constructed once below (task construction validates and
+        # hashes every parameter, so we avoid doing that per branch).
         if self.resume:
-            ard_tasks.append(TriggerResume(resume_token=self.resume_token, reprocess_failed=self.reprocess_failed, workflow=workflow, **kwargs))
+            task_cls = TriggerResume
+            task_kwargs = dict(
+                resume_token=self.resume_token,
+                reprocess_failed=self.reprocess_failed,
+                workflow=workflow,
+                **kwargs
+            )
         elif append:
-            ard_tasks.append(AppendDatesToStack(
+            task_cls = AppendDatesToStack
+            task_kwargs = dict(
                 append_idx=self.append_idx,
                 append_scenes=[str(i) for i in append],
                 workflow=workflow,
                 **common_params(temp, AppendDatesToStack)
-            ))
+            )
         elif workflow == ARDWorkflow.Backscatter:
-            ard_tasks.append(CreateCoregisteredBackscatter(**kwargs))
+            task_cls, task_kwargs = CreateCoregisteredBackscatter, kwargs
         elif workflow == ARDWorkflow.Interferogram:
-            ard_tasks.append(CreateProcessIFGs(**kwargs))
+            task_cls, task_kwargs = CreateProcessIFGs, kwargs
         elif workflow == ARDWorkflow.BackscatterNRT:
-            ard_tasks.append(CreateNRTBackscatter(**kwargs))
+            task_cls, task_kwargs = CreateNRTBackscatter, kwargs
         else:
             raise Exception(f'Unsupported workflow provided: {workflow}')
 
+        ard_tasks = [task_cls(**task_kwargs)]
+
         LOG.info(f"Returning {len(ard_tasks)} ARD tasks that need to be processed")
 
         yield ard_tasks
@@ -366,8 +472,7 @@ class ARD(luigi.WrapperTask):
         proc_file = self.output_path / "config.proc"
         LOG.debug(f"Loading final .proc config {proc_file}")
 
-        with open(proc_file, "r") as proc_fileobj:
-            proc_config = ProcConfig.from_file(proc_fileobj)
+        proc_config = load_proc_config(proc_file)
 
         # Finally once all ARD pipeline dependencies are complete (eg: data processing is complete)
         # - we cleanup files that are no longer required as outputs.
@@ -377,64 +482,15 @@ class ARD(luigi.WrapperTask):
 
         LOG.info("Cleaning up unused files")
 
-        required_files = [
-            # IFG files
-            "INT/**/*_geo_unw.tif",
-            "INT/**/*_flat_geo_coh.tif",
-            "INT/**/*_flat_geo_int.tif",
-            "INT/**/*_filt_geo_coh.tif",
-            "INT/**/*_filt_geo_int.tif",
-            "INT/**/*_base.par",
-            "INT/**/*_bperp.par",
-            "INT/**/*_geo_unw*.png",
-            "INT/**/*_flat_geo_int.png",
-            "INT/**/*_flat_int",
-
-            # SLC files
-            "SLC/**/r*rlks.mli",
-            "SLC/**/r*rlks.mli.par",
-            "SLC/**/r*.slc.par",
-            "SLC/**/*sigma0*.tif",
-            "SLC/**/*gamma0*.tif",
-            "SLC/**/*sigma0*.png",
-            "SLC/**/*gamma0*.png",
-            "SLC/**/ACCURACY_WARNING",
-
-            # DEM files
-            "DEM/**/*rlks_geo_to_rdc.lt",
-            "DEM/**/*_geo_dem.tif",
-            "DEM/**/*_geo.dem.par",
-            "DEM/**/diff_*rlks.par",
-            "DEM/**/*_geo_lv_phi.tif",
-            "DEM/**/*_geo_lv_theta.tif",
-            "DEM/**/*_rdc.dem",
-            "DEM/**/*lsmap*",
-
-            # Keep all lists, metadata, and top level files
-            "lists/*",
-            "**/metadata*.json",
-            "*"
-        ]
-
-        # Generate a list of required files we want to keep
-        keep_files = []
-
-        for outdir in self.output_dirs:
-            for pattern in required_files:
-                keep_files += outdir.glob(pattern)
-
         # Iterate every single output dir, and remove any file that's not required
         for outdir in self.output_dirs:
-            for file in outdir.rglob("*"):
-                if file.is_dir():
-                    continue
-
-                is_required = any([file.samefile(i) for i in keep_files])
+            for rel_path, file in _iter_files(str(outdir)):
+                is_required = _REQUIRED_FILE_RE.fullmatch(rel_path) is not None
 
                 if not is_required:
                     pass
                     #DR
                     #LOG.info(f"Removing temporary file: {file}", file=file)
-                    #file.unlink()
+                    #os.unlink(file)
                 else:
                     LOG.info(f"Keeping required file: {file}", file=file)
@@ -1,3 +1,4 @@
+import re
 from pathlib import Path
 from typing import List
 import luigi
@@ -6,16 +7,19 @@ from luigi.util import requires
 import structlog
 
 from insar.constant import SCENE_DATE_FMT
-from insar.project import ProcConfig
 from insar.process_backscatter import generate_nrt_backscatter
 from insar.logs import STATUS_LOGGER
 from insar.paths.slc import SlcPaths
 from insar.paths.stack import StackPaths
 
-from insar.workflow.luigi.utils import PathParameter, tdir, load_settings, get_scenes, read_rlks_alks
+from insar.workflow.luigi.utils import PathParameter, tdir, load_settings, get_scenes, read_rlks_alks, touch_output, write_status, load_proc_config, find_status_files, find_failed_status_files, format_scene_date
 from insar.workflow.luigi.dem import CreateGammaDem
 from insar.workflow.luigi.multilook import CreateMultilook
 
+# Matches the (source stem, scene date) of a NRT backscatter status file name
+_NBR_STATUS_RE = re.compile(r"^(r?([^_]+).*)_nrt_nbr_logs\.out$")
+
+
 class ProcessNRTBackscatter(luigi.Task):
     """
     Produces a quick radar backscatter product for an SLC.
@@ -31,7 +35,7 @@ class ProcessNRTBackscatter(luigi.Task):
     def output(self):
         return luigi.LocalTarget(
             tdir(self.workdir).joinpath(
-                f"{Path(str(self.src_path)).stem}_nrt_nbr_logs.out"
+                f"{Path(self.src_path).stem}_nrt_nbr_logs.out"
             )
         )
 
@@ -40,35 +44,35 @@ class ProcessNRTBackscatter(luigi.Task):
             scene=self.src_path,
         )
 
-        try:
-            structlog.threadlocal.clear_threadlocal()
+        failed = False
 
+        try:
             outdir = Path(self.outdir)
-            slc_date, slc_pol = Path(self.src_path).stem.split('_')[:2]
+            src_path = Path(self.src_path)
+            slc_date, slc_pol = src_path.stem.split('_')[:2]
             slc_date = slc_date.lstrip("r")
 
-            structlog.threadlocal.bind_threadlocal(
+            # Note: the scene's log context is only bound for the duration of this task
+            with structlog.contextvars.bound_contextvars(
                 task="Normalised radar backscatter (NRT)",
                 scene_dir=outdir,
                 scene_date=slc_date,
                 polarisation=slc_pol
-            )
+            ):
+                proc_config, metadata = load_settings(Path(self.proc_file))
+                stack_id = metadata["stack_id"]
 
-            proc_config, metadata = load_settings(Path(self.proc_file))
-            stack_id = metadata["stack_id"]
+                dem = outdir / proc_config.gamma_dem_dir / f"{stack_id}.dem"
+                log.info("Beginning normalised radar backscatter (NRT)", dem=dem)
 
-            failed = False
-            dem = outdir / proc_config.gamma_dem_dir / f"{stack_id}.dem"
-            log.info("Beginning normalised radar backscatter (NRT)", dem=dem)
+                generate_nrt_backscatter(
+                    outdir,
+                    src_path,
+                    dem,
+                    Path(self.dst_stem),
+                )
 
-            generate_nrt_backscatter(
-                Path(self.outdir),
-                Path(self.src_path),
-                dem,
-                Path(self.dst_stem),
-            )
-
-            log.info("Normalised radar backscatter (NRT) complete")
+                log.info("Normalised radar backscatter (NRT) complete")
         except Exception as e:
             log.error("Normalised radar backscatter (NRT) failed with exception", exc_info=True)
             failed = True
@@ -76,10 +80,7 @@ class ProcessNRTBackscatter(luigi.Task):
             # We flag a task as complete no matter if the scene failed or not!
             # - however we do write if the scene failed, so it can be reprocessed
             # - later automatically if need be.
-            with self.output().open("w") as f:
-                f.write("FAILED" if failed else "")
-
-            structlog.threadlocal.clear_threadlocal()
+            write_status(self.output(), failed)
 
 
 @requires(CreateGammaDem, CreateMultilook)
@@ -107,36 +108,33 @@ class CreateNRTBackscatter(luigi.Task):
         if self.output().exists():
             self.output().remove()
 
-        # Remove completion status files for any failed SLC coreg tasks
-        triggered_dates = []
-
-        nbr_outfile_pattern = "*_nrt_nbr_logs.out"
-        nbr_outfile_suffix_len = len(nbr_outfile_pattern)-1
-
-        if reprocess_failed_scenes:
-            for status_out in tdir(self.workdir).glob(nbr_outfile_pattern):
-                mli = status_out.name[:-nbr_outfile_suffix_len] + ".mli"
-                scene_date = mli.split("_")[0].lstrip("r")
+        # Remove completion status files for any failed SLC backscatter tasks, and
+        # for any we're asked to (from a single listing of the task dir).
+        triggered_dates = set()
+        reprocess_dates = {format_scene_date(i) for i in reprocess_dates}
 
-                with status_out.open("r") as file:
-                    contents = file.read().splitlines()
+        status_files = {}
+        for status_out in find_status_files(self.workdir, "_nrt_nbr_logs.out"):
+            match = _NBR_STATUS_RE.match(status_out.name)
+            if match:
+                status_files[status_out] = match.groups()
 
-                if len(contents) > 0 and "FAILED" in contents[0]:
-                    triggered_dates.append(scene_date)
+        failed_status_files = find_failed_status_files(status_files) if reprocess_failed_scenes else set()
 
-                    log.info(f"Resuming SLC backscatter ({mli}) because of FAILED processing")
-                    status_out.unlink()
+        for status_out, (mli_stem, scene_date) in status_files.items():
+            mli = f"{mli_stem}.mli"
 
-        # Remove completion status files for any we're asked to
-        for date in reprocess_dates:
-            for status_out in tdir(self.workdir).glob(f"*{date}_" + nbr_outfile_pattern):
-                mli = status_out.name[:-nbr_outfile_suffix_len] + ".mli"
-                scene_date = mli.split("_")[0].lstrip("r")
+            if status_out in failed_status_files:
+                reason = "FAILED processing"
+            elif scene_date in reprocess_dates:
+                reason = "dependency"
+            else:
+                continue
 
-                triggered_dates.append(scene_date)
+            triggered_dates.add(scene_date)
 
-                log.info(f"Resuming SLC backscatter ({mli}) because of dependency")
-                status_out.unlink()
+            log.info(f"Resuming SLC backscatter ({mli}) because of {reason}")
+            status_out.unlink()
 
         return triggered_dates
 
@@ -146,8 +144,7 @@ class CreateNRTBackscatter(luigi.Task):
 
         # Load the gamma proc config file
         proc_path = Path(self.proc_file)
-        with proc_path.open("r") as proc_fileobj:
-            proc_config = ProcConfig.from_file(proc_fileobj)
+        proc_config = load_proc_config(proc_path)
 
         paths = StackPaths(proc_config)
 
@@ -180,5 +177,4 @@ class CreateNRTBackscatter(luigi.Task):
 
         yield jobs
 
-        with self.output().open("w") as f:
-            f.write("")
+        touch_output(self.output())
@@ -2,13 +2,12 @@ import luigi
 from luigi.util import requires
 
 from insar.constant import SCENE_DATE_FMT
-from insar.project import ProcConfig
 from insar.calc_baselines_new import BaselineProcess
 from insar.logs import STATUS_LOGGER
 from insar.paths.stack import StackPaths
 from insar.paths.slc import SlcPaths
 
-from insar.workflow.luigi.utils import PathParameter, tdir, get_scenes, read_primary_date
+from insar.workflow.luigi.utils import PathParameter, tdir, get_scenes, read_primary_date, touch_output, DirListingCache, load_proc_config
 from insar.workflow.luigi.multilook import CreateMultilook
 
 
@@ -30,13 +29,13 @@ class CalcInitialBaseline(luigi.Task):
         log.info("Beginning baseline calculation")
 
         # Load the gamma proc config file
-        with open(str(self.proc_file), "r") as proc_fileobj:
-            proc_config = ProcConfig.from_file(proc_fileobj)
+        proc_config = load_proc_config(self.proc_file)
 
         paths = StackPaths(proc_config)
         slc_frames = get_scenes(paths.acquisition_csv)
 
         slc_par_files = []
+        slc_dir_cache = DirListingCache()
         primary_pol = proc_config.polarisation
         polarizations = [primary_pol]
 
@@ -54,11 +53,10 @@ class CalcInitialBaseline(luigi.Task):
                 slc_paths = SlcPaths(proc_config, slc_scene, _pols[0])
                 polarizations.append(_pols[0])
 
-            if not slc_paths.slc_par.exists():
-                raise FileNotFoundError(f"missing {slc_paths.slc_par} file")
-
             slc_par_files.append(slc_paths.slc_par)
 
+        slc_dir_cache.require(slc_par_files)
+
         baseline = BaselineProcess(
             slc_par_files,
             list(set(polarizations)),
@@ -71,6 +69,5 @@ class CalcInitialBaseline(luigi.Task):
 
         log.info("Baseline calculation complete")
 
-        with self.output().open("w") as out_fid:
-            out_fid.write("")
+        touch_output(self.output())
 
@@ -1,5 +1,7 @@
+import os
+import re
 from pathlib import Path
-from typing import List
+from typing import List, Tuple
 import luigi
 import luigi.configuration
 from luigi.util import requires
@@ -13,7 +15,6 @@ from insar.coregister_dem import coregister_primary
 # FIXME: insar.coregister_slc is mostly S1 specific, should be renamed as such
 from insar.coregister_slc import coregister_s1_secondary, apply_s1_coregistration
 from insar.coregister_secondary import coregister_secondary, apply_coregistration
-from insar.stack import load_stack_config
 from insar.project import ProcConfig
 from insar.paths.slc import SlcPaths
 from insar.paths.stack import StackPaths
@@ -21,40 +22,73 @@ from insar.paths.dem import DEMPaths
 from insar.paths.coregistration import CoregisteredPrimaryPaths, CoregisteredSlcPaths
 from insar.logs import STATUS_LOGGER as LOG
 
-from insar.workflow.luigi.utils import read_primary_date, tdir, load_settings, read_rlks_alks, get_scenes, read_file_line, mk_clean_dir
+from insar.workflow.luigi.utils import read_primary_date, tdir, load_settings, read_rlks_alks, get_scenes, mk_clean_dir, touch_output, write_status, find_status_files, find_failed_status_files, load_proc_config, format_scene_date, write_text_if_changed
 from insar.workflow.luigi.utils import PathParameter
 from insar.workflow.luigi.dem import CreateGammaDem
 from insar.workflow.luigi.baseline import CalcInitialBaseline
 
 
+_SECONDARIES_LIST_RE = re.compile(r"^secondaries(\d+)\.list$")
+
+
+def find_secondaries_lists(list_dir: Path) -> List[Tuple[int, Path]]:
+    """
+    Finds a stack's secondaries lists (one per level of the coregistration tree).
+
+    :returns:
+        A list of (list index, list path) tuples in tree order, the index being
+        the 1-based tree level of the `secondaries<index>.list` file.
+    """
+    secondaries_lists = []
+
+    try:
+        with os.scandir(list_dir) as entries:
+            for entry in entries:
+                match = _SECONDARIES_LIST_RE.match(entry.name)
+                if match:
+                    secondaries_lists.append((int(match.group(1)), Path(entry.path)))
+    except FileNotFoundError:
+        return []
+
+    return sorted(secondaries_lists)
+
+
 def get_coreg_date_pairs(outdir: Path, proc_config: ProcConfig):
     list_dir = outdir / proc_config.list_dir
     primary_scene = read_primary_date(outdir).strftime(SCENE_DATE_FMT)
 
-    pairs = []
+    secondaries_lists = find_secondaries_lists(list_dir)
 
-    for secondaries_list in list_dir.glob("secondaries*.list"):
-        list_index = int(secondaries_list.stem[11:])
-        prev_list_idx = list_index - 1
+    # Read each level of the tree once, the "end" dates of each level are
+    # looked up by the level that follows it.
+    #
+    # Note: blank lines (eg: a trailing new line) aren't scenes
+    list_date_strings = {
+        list_index: [dt for dt in map(str.strip, secondaries_list.read_text().splitlines()) if dt]
+        for list_index, secondaries_list in secondaries_lists
+    }
 
-        with secondaries_list.open("r") as file:
-            list_date_strings = file.read().splitlines()
+    pairs = []
 
+    for list_index, _ in secondaries_lists:
         # The first tier of the tree is always coregistered to primary ref date
         if list_index == 1:
-            pairs += [(primary_scene, dt) for dt in list_date_strings]
+            pairs += [(primary_scene, dt) for dt in list_date_strings[list_index]]
 
         # All the rest coregister to the closest "end" date in the previous level of the tree
         else:
-            for slc_scene in list_date_strings:
-                if int(slc_scene) < int(proc_config.ref_primary_scene):
-                    coreg_ref_scene = read_file_line(list_dir / f'secondaries{prev_list_idx}.list', 0)
-                elif int(slc_scene) > int(proc_config.ref_primary_scene):
-                    coreg_ref_scene = read_file_line(list_dir / f'secondaries{prev_list_idx}.list', -1)
+            prev_list_dates = list_date_strings[list_index - 1]
+            ref_primary_scene = int(proc_config.ref_primary_scene)
+
+            for slc_scene in list_date_strings[list_index]:
+                if int(slc_scene) < ref_primary_scene:
+                    coreg_ref_scene = prev_list_dates[0]
+                elif int(slc_scene) > ref_primary_scene:
+                    coreg_ref_scene = prev_list_dates[-1]
                 else:  # slc_scene == primary_scene
                     continue
 
-            pairs.append((coreg_ref_scene, slc_scene))
+                pairs.append((coreg_ref_scene, slc_scene))
 
     return pairs
 
@@ -129,7 +163,7 @@ class CoregisterDemPrimary(luigi.Task):
 
         try:
             # Load the gamma proc config file
-            proc_config = load_stack_config(self.proc_file)
+            proc_config = load_proc_config(self.proc_file)
 
             primary_scene = read_primary_date(outdir).strftime(SCENE_DATE_FMT)
             primary_pol = proc_config.polarisation
@@ -191,8 +225,7 @@ class CoregisterDemPrimary(luigi.Task):
             failed = True
             raise e
         finally:
-            with self.output().open("w") as f:
-                f.write("FAILED" if failed else "")
+            write_status(self.output(), failed)
 
             structlog.threadlocal.clear_threadlocal()
 
@@ -223,11 +256,11 @@ class CoregisterSecondary(luigi.Task):
 
     def output(self):
         return luigi.LocalTarget(
-            tdir(self.workdir) / f"{Path(str(self.slc_primary)).stem}_{Path(str(self.slc_secondary)).stem}_coreg_logs.out"
+            tdir(self.workdir) / f"{Path(self.slc_primary).stem}_{Path(self.slc_secondary).stem}_coreg_logs.out"
         )
 
     def requires(self):
-        proc_config = load_stack_config(self.proc_file)
+        proc_config = load_proc_config(self.proc_file)
 
         primary_pol = proc_config.polarisation
         secondary_date, secondary_pol = Path(self.slc_secondary).stem.split('_')
@@ -256,8 +289,6 @@ class CoregisterSecondary(luigi.Task):
         )
         log.info(f"Beginning SLC coregistration for {secondary_date} with outdir {self.outdir}")
 
-        kwargs = get_coreg_kwargs(self.proc_file, secondary_date, secondary_pol)
-
         # get range and azimuth looked values
         ml_file = tdir(proc_config.job_path) / f"{stack_id}_createmultilook_status_logs.out"
         rlks, alks = read_rlks_alks(ml_file)
@@ -346,8 +377,7 @@ class CoregisterSecondary(luigi.Task):
             # We flag a task as complete no matter if the scene failed or not!
             # - however we do write if the scene failed, so it can be reprocessed
             # - later automatically if need be.
-            with self.output().open("w") as f:
-                f.write("FAILED" if failed else "")
+            write_status(self.output(), failed)
 
 
 @requires(CoregisterDemPrimary)
@@ -377,33 +407,29 @@ class CreateCoregisterSecondaries(luigi.Task):
         if output.exists():
             output.remove()
 
-        # Remove completion status files for any failed SLC coreg tasks
+        # Remove completion status files for any failed SLC coreg tasks, and
+        # for any we're asked to (from a single listing of the task dir).
         triggered_pairs = []
+        reprocess_dates = {format_scene_date(i) for i in reprocess_dates}
 
-        if reprocess_failed_scenes:
-            for status_out in tdir(self.workdir).glob("*_coreg_logs.out"):
-                with status_out.open("r") as file:
-                    contents = file.read().splitlines()
-
-                if len(contents) > 0 and "FAILED" in contents[0]:
-                    parts = status_out.name.split("_")
-                    primary_date, secondary_date = parts[0], parts[2]
-
-                    triggered_pairs.append((primary_date, secondary_date))
+        status_files = find_status_files(self.workdir, "_coreg_logs.out")
+        failed_status_files = find_failed_status_files(status_files) if reprocess_failed_scenes else set()
 
-                    log.info(f"Resuming SLC coregistration ({primary_date}, {secondary_date}) because of FAILED processing")
-                    status_out.unlink()
+        for status_out in status_files:
+            parts = status_out.name.split("_")
+            primary_date, secondary_date = parts[0], parts[2]
 
-        # Remove completion status files for any we're asked to
-        for date in reprocess_dates:
-            for status_out in tdir(self.workdir).glob(f"*_*_{date}_*_coreg_logs.out"):
-                parts = status_out.name.split("_")
-                primary_date, secondary_date = parts[0], parts[2]
+            if status_out in failed_status_files:
+                reason = "FAILED processing"
+            elif secondary_date in reprocess_dates:
+                reason = "dependency"
+            else:
+                continue
 
-                triggered_pairs.append((primary_date, secondary_date))
+            triggered_pairs.append((primary_date, secondary_date))
 
-                log.info(f"Resuming SLC coregistration ({primary_date}, {secondary_date}) because of dependency")
-                status_out.unlink()
+            log.info(f"Resuming SLC coregistration ({primary_date}, {secondary_date}) because of {reason}")
+            status_out.unlink()
 
         return triggered_pairs
 
@@ -414,7 +440,7 @@ class CreateCoregisterSecondaries(luigi.Task):
         outdir = Path(self.outdir)
 
         # Load the gamma proc config file
-        proc_config = load_stack_config(self.proc_file)
+        proc_config = load_proc_config(self.proc_file)
 
         paths = StackPaths(proc_config)
 
@@ -445,30 +471,34 @@ class CreateCoregisterSecondaries(luigi.Task):
 
         kwargs = get_coreg_kwargs(self.proc_file)
 
-        secondary_coreg_jobs = []
+        list_dir = outdir / proc_config.list_dir
+        list_dir.mkdir(parents=True, exist_ok=True)
+
+        # Format each frame's date once, rather than for each use below
+        scene_frames = [(dt.date(), dt.strftime(SCENE_DATE_FMT), pols) for dt, _, pols in slc_frames]
+
+        # Build every level of the tree (and write their list files) before any are yielded
+        #
+        # Note: luigi re-runs this task from the top after each yield below, so the list
+        # files are only written if they've changed (eg: on the first run).
+        coreg_levels = []
 
         for list_index, list_dates in enumerate(coreg_tree):
             list_index += 1  # list index is 1-based
-            list_frames = [i for i in slc_frames if i[0].date() in list_dates]
+            list_dates = set(list_dates)
+            list_frames = [i for i in scene_frames if i[0] in list_dates]
 
             # Write list file
-            list_file_path = outdir / proc_config.list_dir / f"secondaries{list_index}.list"
-            if not list_file_path.parent.exists():
-                list_file_path.parent.mkdir(parents=True)
-
-            with open(list_file_path, "w") as listfile:
-                list_date_strings = [
-                    dt.strftime(SCENE_DATE_FMT) for dt, _, _ in list_frames
-                ]
-                listfile.write("\n".join(list_date_strings))
+            list_file_path = list_dir / f"secondaries{list_index}.list"
+            write_text_if_changed(list_file_path, "\n".join(slc_scene for _, slc_scene, _ in list_frames))
 
             # Bash passes '-' for secondaries1.list, and list_index there after.
             if list_index > 1:
                 kwargs["list_idx"] = list_index
 
-            for _dt, _, _pols in list_frames:
-                slc_scene = _dt.strftime(SCENE_DATE_FMT)
+            secondary_coreg_jobs = []
 
+            for _, slc_scene, _pols in list_frames:
                 # primary scene has it's own special coregistration task
                 if slc_scene == primary_scene:
                     continue
@@ -492,7 +522,15 @@ class CreateCoregisterSecondaries(luigi.Task):
 
                     secondary_coreg_jobs.append(CoregisterSecondary(**kwargs))
 
-        yield secondary_coreg_jobs
+            coreg_levels.append(secondary_coreg_jobs)
+
+        # Each level of the tree is yielded as its own batch, as secondaries are
+        # coregistered w/ the prior level's scenes (which CoregisterSecondary does
+        # not declare as a requirement) so the levels must be processed in order.
+        #
+        # Note: when re-run, the levels that are already complete are yielded again
+        # but luigi sees their jobs are complete and carries on straight away.
+        for secondary_coreg_jobs in coreg_levels:
+            yield secondary_coreg_jobs
 
-        with self.output().open("w") as f:
-            f.write("")
+        touch_output(self.output())
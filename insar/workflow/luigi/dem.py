@@ -10,7 +10,7 @@ from pathlib import Path
 from insar.make_gamma_dem import create_gamma_dem
 from insar.logs import STATUS_LOGGER as LOG
 
-from insar.workflow.luigi.utils import tdir, load_settings,  PathParameter
+from insar.workflow.luigi.utils import tdir, load_settings,  PathParameter, touch_output
 from insar.workflow.luigi.stack_setup import InitialSetup
 
 @requires(InitialSetup)
@@ -41,6 +41,5 @@ class CreateGammaDem(luigi.Task):
 
         LOG.info("DEM creation complete")
 
-        with self.output().open("w") as out_fid:
-            out_fid.write("")
+        touch_output(self.output())
 
@@ -2,23 +2,55 @@ import luigi.configuration
 import luigi
 import json
 import re
+import os
 
 from pathlib import Path
-from typing import Tuple, List, Generator
+from typing import Tuple, List, Generator, Optional
 
 from luigi.util import requires
 
 from insar.process_ifg import run_workflow, get_ifg_width, TempFilePaths
-from insar.project import ProcConfig, is_flag_value_enabled
+from insar.project import is_flag_value_enabled
 from insar.paths.interferogram import InterferogramPaths
 from insar.paths.stack import StackPaths
 from insar.paths.dem import DEMPaths
 from insar.coreg_utils import read_land_center_coords
-from insar.stack import load_stack_ifg_pairs
 from insar.logs import STATUS_LOGGER as LOG
-from insar.workflow.luigi.utils import tdir, mk_clean_dir, PathParameter
+from insar.workflow.luigi.utils import tdir, mk_clean_dir, PathParameter, touch_output, load_proc_config, find_status_files, find_failed_status_files, cached_by_file
 from insar.workflow.luigi.backscatter import CreateCoregisteredBackscatter
 
+# Matches the primary/secondary dates of a ProcessIFG status file name
+_IFG_STATUS_RE = re.compile(r"_ifg_([^-_]+)-([^-_]+)_status_logs\.out$")
+
+# Whether to enable baseline refinement for each of the orbit dependent
+# IFG_BASELINE_REFINEMENT settings, given if the (first, second) orbits are precise.
+_BASELINE_REFINEMENT_RULES = {
+    "IF_ANY_NOT_PRECISE": lambda first, second: not first or not second,
+    "IF_BOTH_NOT_PRECISE": lambda first, second: not first and not second,
+    "IF_FIRST_NOT_PRECISE": lambda first, second: not first,
+    "IF_SECOND_NOT_PRECISE": lambda first, second: not second,
+}
+
+
+def load_slc_metadata(metadata_path: Path) -> Optional[dict]:
+    """
+    Loads an SLC's metadata .json file, or returns None if it doesn't exist.
+
+    Each SLC date takes part in many interferograms, so the parsed metadata is
+    cached until the file is modified.  The returned dict is shared by callers
+    and must not be modified.
+    """
+    try:
+        return _load_slc_metadata_cached(metadata_path)
+    except FileNotFoundError:
+        return None
+
+
+@cached_by_file(maxsize=1024)
+def _load_slc_metadata_cached(metadata_path: str) -> dict:
+    with open(metadata_path, "r") as file:
+        return json.load(file)
+
 
 class ProcessIFG(luigi.Task):
     """
@@ -41,8 +73,7 @@ class ProcessIFG(luigi.Task):
 
     def run(self) -> None:
         # Load the gamma proc config file
-        with open(str(self.proc_file), "r") as proc_fileobj:
-            proc_config = ProcConfig.from_file(proc_fileobj)
+        proc_config = load_proc_config(self.proc_file)
 
         log = LOG.bind(
             outdir=self.outdir,
@@ -52,99 +83,82 @@ class ProcessIFG(luigi.Task):
         )
         log.info(f"Beginning interferogram processing for {self.primary_date} - {self.secondary_date}")
 
-        # Run IFG processing in an exception handler that doesn't propagate exception into Luigi
-        # This is to allow processing to fail without stopping the Luigi pipeline, and thus
-        # allows as many scenes as possible to fully process even if some scenes fail.
-        failed = False
-        # try:
-        if True:
-            ic = InterferogramPaths(proc_config, self.primary_date, self.secondary_date)
-            dc = DEMPaths(proc_config)
-            tc = TempFilePaths(ic)
-
-            # Run interferogram processing workflow w/ ifg width specified in r_primary_mli par file
-            with ic.r_primary_mli_par.open("r") as fileobj:
-                ifg_width = get_ifg_width(fileobj)
-
-            # Read land center coordinates from shape file (if it exists)
-            land_center_latlon = None
-            if proc_config.land_center:
-                land_center_latlon = proc_config.land_center
-            elif self.shape_file:
-                land_center_latlon = read_land_center_coords(Path(self.shape_file))
-
-            # Determine date pair orbit attributes
-            # Note: This only works for S1 (but also... S1 is the only sensor we support whose data comes w/ orbit files)
-            # - other sensors we ignore entirely (and thus do no baseline refinement unless forced ON), which is the safest
-            # - option (and why this was the only hard-coded option before now, and remains the default).
-            first_slc_meta = ic.primary_dir / f"metadata_{proc_config.polarisation}.json"
-            second_slc_meta = ic.secondary_dir / f"metadata_{proc_config.polarisation}.json"
-
-            first_orbit_precise = None
-            second_orbit_precise = None
-
-            # As noted above, only sensors which have orbit files will have this metadata
-            # (which is just S1 for now)
-            if first_slc_meta.exists():
-                first_slc_meta_json = json.loads(first_slc_meta.read_text())
-
-                # And some sensors may have metadata, but simply no orbit files
-                if "slc" in str(first_slc_meta) and ("orbit_url" in str(first_slc_meta_json["slc"])):
-                    first_orbit_precise = "POEORB" in str(first_slc_meta_json["slc"]["orbit_url"] or "")
-
-            if second_slc_meta.exists():
-                second_slc_meta_json = json.loads(second_slc_meta.read_text())
-
-                if "slc" in str(second_slc_meta) and "orbit_url" in str(second_slc_meta_json["slc"]):
-                    second_orbit_precise = "POEORB" in str(second_slc_meta_json["slc"]["orbit_url"] or "")
-
-            # Determine if baseline refinement should be enabled based on a .proc
-            # setting (this exists as InSAR team aren't sure on their exact requirements
-            # right now / there's no obvious "general" solution for all cases)
-            enable_refinement = False
-
-            try:
-                enable_refinement = is_flag_value_enabled(proc_config.ifg_baseline_refinement)
-
-            except ValueError:
-                if first_orbit_precise is not None and second_orbit_precise is not None:
-                    if proc_config.ifg_baseline_refinement.upper() == "IF_ANY_NOT_PRECISE":
-                        enable_refinement = not first_orbit_precise or not second_orbit_precise
-
-                    elif proc_config.ifg_baseline_refinement.upper() == "IF_BOTH_NOT_PRECISE":
-                        enable_refinement = not first_orbit_precise and not second_orbit_precise
-
-                    elif proc_config.ifg_baseline_refinement.upper() == "IF_FIRST_NOT_PRECISE":
-                        enable_refinement = not first_orbit_precise
-
-                    elif proc_config.ifg_baseline_refinement.upper() == "IF_SECOND_NOT_PRECISE":
-                        enable_refinement = not second_orbit_precise
-
-            if enable_refinement:
-                log.info("IFG baseline refinement enabled", ifg_baseline_refinement=proc_config.ifg_baseline_refinement)
-
-            # Make sure output IFG dir is clean/empty, in case
-            # we're resuming an incomplete/partial job.
-            mk_clean_dir(ic.ifg_dir)
-
-            run_workflow(
-                proc_config,
-                ic,
-                dc,
-                tc,
-                ifg_width,
-                enable_refinement=enable_refinement,
-                land_center_latlon=land_center_latlon,
-            )
+        # Note: exceptions in IFG processing are propagated into Luigi (failing the task
+        # without writing its status file), rather than being flagged as FAILED.
+        ic = InterferogramPaths(proc_config, self.primary_date, self.secondary_date)
+        dc = DEMPaths(proc_config)
+        tc = TempFilePaths(ic)
+
+        # Run interferogram processing workflow w/ ifg width specified in r_primary_mli par file
+        with ic.r_primary_mli_par.open("r") as fileobj:
+            ifg_width = get_ifg_width(fileobj)
+
+        # Read land center coordinates from shape file (if it exists)
+        land_center_latlon = None
+        if proc_config.land_center:
+            land_center_latlon = proc_config.land_center
+        elif self.shape_file:
+            land_center_latlon = read_land_center_coords(Path(self.shape_file))
+
+        # Determine date pair orbit attributes
+        # Note: This only works for S1 (but also... S1 is the only sensor we support whose data comes w/ orbit files)
+        # - other sensors we ignore entirely (and thus do no baseline refinement unless forced ON), which is the safest
+        # - option (and why this was the only hard-coded option before now, and remains the default).
+        first_slc_meta = ic.primary_dir / f"metadata_{proc_config.polarisation}.json"
+        second_slc_meta = ic.secondary_dir / f"metadata_{proc_config.polarisation}.json"
+
+        first_orbit_precise = None
+        second_orbit_precise = None
+
+        # As noted above, only sensors which have orbit files will have this metadata
+        # (which is just S1 for now)
+        first_slc_meta_json = load_slc_metadata(first_slc_meta)
+        second_slc_meta_json = load_slc_metadata(second_slc_meta)
+
+        if first_slc_meta_json is not None:
+            # And some sensors may have metadata, but simply no orbit files
+            first_slc = first_slc_meta_json.get("slc") or {}
+            if "orbit_url" in first_slc:
+                first_orbit_precise = "POEORB" in (first_slc["orbit_url"] or "")
+
+        if second_slc_meta_json is not None:
+            second_slc = second_slc_meta_json.get("slc") or {}
+            if "orbit_url" in second_slc:
+                second_orbit_precise = "POEORB" in (second_slc["orbit_url"] or "")
+
+        # Determine if baseline refinement should be enabled based on a .proc
+        # setting (this exists as InSAR team aren't sure on their exact requirements
+        # right now / there's no obvious "general" solution for all cases)
+        enable_refinement = False
+
+        try:
+            enable_refinement = is_flag_value_enabled(proc_config.ifg_baseline_refinement)
+
+        except ValueError:
+            refinement_rule = _BASELINE_REFINEMENT_RULES.get(proc_config.ifg_baseline_refinement.upper())
+
+            if refinement_rule and first_orbit_precise is not None and second_orbit_precise is not None:
+                enable_refinement = refinement_rule(first_orbit_precise, second_orbit_precise)
+
+        if enable_refinement:
+            log.info("IFG baseline refinement enabled", ifg_baseline_refinement=proc_config.ifg_baseline_refinement)
+
+        # Make sure output IFG dir is clean/empty, in case
+        # we're resuming an incomplete/partial job.
+        mk_clean_dir(ic.ifg_dir)
+
+        run_workflow(
+            proc_config,
+            ic,
+            dc,
+            tc,
+            ifg_width,
+            enable_refinement=enable_refinement,
+            land_center_latlon=land_center_latlon,
+        )
 
-            log.info("Interferogram complete")
-            # except Exception as e:
-            #    log.error("Interferogram failed with exception", exc_info=True)
-            #    failed = True
-            # finally:
-            # We flag a task as complete no matter if the scene failed or not!
-            with self.output().open("w") as f:
-                f.write("FAILED" if failed else "")
+        log.info("Interferogram complete")
+        touch_output(self.output())
 
 
 @requires(CreateCoregisteredBackscatter)
@@ -166,8 +180,7 @@ class CreateProcessIFGs(luigi.Task):
         log = LOG.bind(stack_id=self.stack_id)
 
         # Load the gamma proc config file
-        with open(str(self.proc_file), "r") as proc_fileobj:
-            proc_config = ProcConfig.from_file(proc_fileobj)
+        proc_config = load_proc_config(self.proc_file)
 
         stack_paths = StackPaths(proc_config)
 
@@ -182,52 +195,69 @@ class CreateProcessIFGs(luigi.Task):
         # - this is distinct from those that raised errors explicitly, to handle
         # - cases people have manually deleted outputs (accidentally or intentionally)
         # - and cases where jobs have been terminated mid processing.
-        reprocess_pairs = []
+        #
+        # Note: a dict is used as an insertion ordered set of pairs
+        reprocess_pairs = {}
 
-        load_stack_ifg_pairs(proc_config)
         ifgs_list_file = stack_paths.ifg_pair_lists[0]
         if ifgs_list_file.exists():
             with open(ifgs_list_file) as fd:
-                date_pairs = [dates.split(",") for dates in fd.read().splitlines()]
+                date_pairs = (line.rstrip("\r\n").split(",") for line in fd)
                 ifgs_pairs = [(Path(d1), Path(d2)) for d1, d2 in date_pairs]
 
+            # IFGs which don't even have a dir yet are missing their outputs, which
+            # we find from a single listing of the int dir instead of stat'ing them.
+            try:
+                with os.scandir(stack_paths.int_dir) as entries:
+                    existing_ifg_dirs = {i.name for i in entries}
+            except FileNotFoundError:
+                existing_ifg_dirs = set()
+
             for primary_date, secondary_date in ifgs_pairs:
                 ic = InterferogramPaths(proc_config, primary_date, secondary_date)
 
-                # Check for existence of filtered coh geocode files, if neither exist we need to re-run.
-                ifg_filt_coh_geo_out = ic.ifg_dir / ic.ifg_filt_coh_geocode_out
-                ifg_filt_coh_geo_out_tiff = ic.ifg_dir / ic.ifg_filt_coh_geocode_out_tiff
+                if ic.ifg_dir.name in existing_ifg_dirs:
+                    # Note: the geocode output paths are relative to the IFG dir
+                    ifg_filt_coh_geo_out = ic.ifg_dir / ic.ifg_filt_coh_geocode_out
+                    ifg_filt_coh_geo_out_tiff = ic.ifg_dir / ic.ifg_filt_coh_geocode_out_tiff
 
-                if not ic.ifg_filt_coh_geocode_out.exists() and not ifg_filt_coh_geo_out_tiff.exists():
-                    log.info(f"Resuming IFG ({primary_date},{secondary_date}) because of missing geocode outputs")
-                    reprocess_pairs.append((primary_date, secondary_date))
+                    # Check for existence of filtered coh geocode files, if neither exist we need to re-run.
+                    if ifg_filt_coh_geo_out.exists() or ifg_filt_coh_geo_out_tiff.exists():
+                        continue
+
+                log.info(f"Resuming IFG ({primary_date},{secondary_date}) because of missing geocode outputs")
+                reprocess_pairs[(primary_date, secondary_date)] = None
 
         # Remove completion status files for any failed SLC coreg tasks.
         # This is probably slightly redundant, but we 'do' write FAILED to status outs
         # in the error handler, thus for cases this occurs but the above logic doesn't
         # apply, we have this as well just in case.
         if reprocess_failed_scenes:
-            for status_out in tdir(self.workdir).glob("*_ifg_*_status_logs.out"):
-                with status_out.open("r") as file:
-                    contents = file.read().splitlines()
-
-                if len(contents) > 0 and "FAILED" in contents[0]:
-                    primary_date, secondary_date = (Path(d) for d in re.split("[-_]", status_out.stem)[-4:-2])
+            status_files = {}
+            for status_out in find_status_files(self.workdir, "_status_logs.out"):
+                match = _IFG_STATUS_RE.search(status_out.name)
+                if match:
+                    status_files[status_out] = match.groups()
 
-                    log.info(f"Resuming IFG ({primary_date},{secondary_date}) because of FAILED processing")
-                    reprocess_pairs.append((primary_date, secondary_date))
+            for status_out in find_failed_status_files(status_files):
+                primary_date, secondary_date = (Path(d) for d in status_files[status_out])
 
-        reprocess_pairs = list(set(reprocess_pairs))
+                log.info(f"Resuming IFG ({primary_date},{secondary_date}) because of FAILED processing")
+                reprocess_pairs[(primary_date, secondary_date)] = None
 
         # Any pairs that need reprocessing, we remove the status file of + clean the tree
+        task_dir = tdir(self.workdir)
+
         for primary_date, secondary_date in reprocess_pairs:
-            status_file = tdir(self.workdir) / f"{self.stack_id}_ifg_{primary_date}-{secondary_date}_status_logs.out"
+            status_file = task_dir / f"{self.stack_id}_ifg_{primary_date}-{secondary_date}_status_logs.out"
 
             # Remove Luigi status file
-            if status_file.exists():
+            try:
                 status_file.unlink()
+            except FileNotFoundError:
+                pass
 
-        return reprocess_pairs
+        return list(reprocess_pairs)
 
     def run(self) -> Generator[List[ProcessIFG], None, None]:
 
@@ -235,28 +265,25 @@ class CreateProcessIFGs(luigi.Task):
         log.info("Process interferograms task")
 
         # Load the gamma proc config file
-        with open(str(self.proc_file), "r") as proc_fileobj:
-            proc_config = ProcConfig.from_file(proc_fileobj)
+        proc_config = load_proc_config(self.proc_file)
 
         # Parse ifg_list to schedule jobs for each interferogram
         with open(Path(self.outdir) / proc_config.list_dir / proc_config.ifg_list) as ifg_list_file:
-            ifgs_list = [dates.split(",") for dates in ifg_list_file.read().splitlines()]
-
-        jobs = []
-        for primary_date, secondary_date in ifgs_list:
-            jobs.append(
-                ProcessIFG(
-                    proc_file=self.proc_file,
-                    shape_file=self.shape_file,
-                    stack_id=self.stack_id,
-                    outdir=self.outdir,
-                    workdir=self.workdir,
-                    primary_date=primary_date,
-                    secondary_date=secondary_date,
-                )
-            )
+            ifgs_list = [line.rstrip("\r\n").split(",") for line in ifg_list_file]
+
+        kwargs = {
+            "proc_file": self.proc_file,
+            "shape_file": self.shape_file,
+            "stack_id": self.stack_id,
+            "outdir": self.outdir,
+            "workdir": self.workdir,
+        }
+
+        jobs = [
+            ProcessIFG(**kwargs, primary_date=primary_date, secondary_date=secondary_date)
+            for primary_date, secondary_date in ifgs_list
+        ]
 
         yield jobs
 
-        with self.output().open("w") as f:
-            f.write("")
+        touch_output(self.output())
@@ -7,13 +7,12 @@ from luigi.util import requires
 from pathlib import Path
 
 from insar.constant import SCENE_DATE_FMT
-from insar.project import ProcConfig
 from insar.calc_multilook_values import calculate_mean_look_values
 from insar.paths.stack import StackPaths
 from insar.paths.slc import SlcPaths
 from insar.logs import STATUS_LOGGER as LOG
 
-from insar.workflow.luigi.utils import tdir, get_scenes
+from insar.workflow.luigi.utils import tdir, get_scenes, touch_output, DirListingCache, load_proc_config
 from insar.workflow.luigi.s1 import CreateFullSlc, ProcessSlcMosaic
 
 @requires(CreateFullSlc)
@@ -32,33 +31,35 @@ class CreateSlcMosaic(luigi.Task):
     def run(self):
         outdir = Path(self.outdir)
 
-        with open(self.proc_file, "r") as proc_fileobj:
-            proc_config = ProcConfig.from_file(proc_fileobj)
+        proc_config = load_proc_config(self.proc_file)
 
         paths = StackPaths(proc_config)
         slc_dir = outdir / proc_config.slc_dir
         slc_frames = get_scenes(paths.acquisition_csv)
 
-        # Get all VV par files and compute range and azimuth looks
+        # Format each scene's date and find its enabled polarisations in a single pass
+        # over the frames, which is shared by each of the steps below.
+        #
+        # This pass also gets all VV par files to compute range and azimuth looks
+        scenes = []
         slc_par_files = []
+        slc_dir_cache = DirListingCache()
+        enabled_pols = frozenset(self.polarization)
         for _dt, status_frame, _pols in slc_frames:
             slc_scene = _dt.strftime(SCENE_DATE_FMT)
+            scene_enabled_pols = [_pol for _pol in _pols if _pol in enabled_pols]
+            scenes.append((slc_scene, status_frame, _pols, scene_enabled_pols))
 
-            for _pol in _pols:
-                if _pol not in self.polarization or _pol.upper() != proc_config.polarisation:
-                    continue
-
-                slc_paths = SlcPaths(proc_config, slc_scene, _pol)
-
-                if not slc_paths.slc_par.exists():
-                    raise FileNotFoundError(f"missing {slc_paths.slc_par} file")
+            for _pol in scene_enabled_pols:
+                if _pol.upper() == proc_config.polarisation:
+                    slc_par_files.append(SlcPaths(proc_config, slc_scene, _pol).slc_par)
 
-                slc_par_files.append(slc_paths.slc_par)
+        slc_dir_cache.require(slc_par_files)
 
         # range and azimuth looks are only computed from VV polarization
         rlks, alks, *_ = calculate_mean_look_values(
             slc_par_files,
-            int(str(self.multi_look)),
+            int(self.multi_look),
         )
         LOG.debug(f"Parameter multi_look={self.multi_look}")
         LOG.debug(f"Mean looks from VV polarisation are rlks={rlks} and alks={alks}")
@@ -68,31 +69,31 @@ class CreateSlcMosaic(luigi.Task):
         resize_primary_tab = None
         resize_primary_scene = None
         resize_primary_pol = None
-        for _dt, status_frame, _pols in slc_frames:
-            slc_scene = _dt.strftime(SCENE_DATE_FMT)
-
-            for _pol in _pols:
-                if status_frame:
-                    slc_paths = SlcPaths(proc_config, slc_scene, self.polarization)
+        for slc_scene, status_frame, _pols, _ in scenes:
+            # Only the first polarisation of a complete frame is considered
+            if not status_frame or len(_pols) == 0:
+                continue
+
+            _pol = _pols[0]
+            slc_paths = SlcPaths(proc_config, slc_scene, _pol)
+
+            resize_task = ProcessSlcMosaic(
+                scene_date=slc_scene,
+                raw_path=paths.acquisition_dir,
+                polarization=_pol,
+                burst_data=paths.acquisition_csv,
+                slc_dir=paths.slc_dir,
+                workdir=self.workdir,
+                rlks=rlks,
+                alks=alks
+            )
+            yield resize_task
 
-                    resize_task = ProcessSlcMosaic(
-                        scene_date=slc_scene,
-                        raw_path=paths.acquisition_dir,
-                        polarization=_pol,
-                        burst_data=paths.acquisition_csv,
-                        slc_dir=paths.slc_dir,
-                        workdir=self.workdir,
-                        rlks=rlks,
-                        alks=alks
-                    )
-                    yield resize_task
-                    resize_primary_tab = slc_paths.slc_tab
-                    break
-            if resize_primary_tab is not None:
-                if resize_primary_tab.exists():
-                    resize_primary_scene = slc_scene
-                    resize_primary_pol = _pol
-                    break
+            if slc_paths.slc_tab.exists():
+                resize_primary_tab = slc_paths.slc_tab
+                resize_primary_scene = slc_scene
+                resize_primary_pol = _pol
+                break
 
         # need at least one complete frame to enable further processing of the stacks
         # The frame definition were generated using all sentinel-1 acquisition dataset, thus
@@ -106,11 +107,8 @@ class CreateSlcMosaic(luigi.Task):
             )
 
         slc_tasks = []
-        for _dt, status_frame, _pols in slc_frames:
-            slc_scene = _dt.strftime(SCENE_DATE_FMT)
-            for _pol in _pols:
-                if _pol not in self.polarization:
-                    continue
+        for slc_scene, _, _, scene_enabled_pols in scenes:
+            for _pol in scene_enabled_pols:
                 if slc_scene == resize_primary_scene and _pol == resize_primary_pol:
                     continue
                 slc_tasks.append(
@@ -130,10 +128,12 @@ class CreateSlcMosaic(luigi.Task):
 
 
         # clean up raw data directory immediately (as it's tens of GB / the sooner we delete it the better)
-        if self.cleanup and paths.acquisition_dir.exists():
+        #
+        # Note: rmtree with ignore_errors already handles a missing directory, so
+        # there's no need to stat it first.
+        if self.cleanup:
             LOG.debug(f"Deleting path {paths.acquisition_dir}")
-            #shutil.rmtree(paths.acquisition_dir)
+            #shutil.rmtree(paths.acquisition_dir, ignore_errors=True)
             #DR FIX
 
-        with self.output().open("w") as out_fid:
-            out_fid.write("")
+        touch_output(self.output())
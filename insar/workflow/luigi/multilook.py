@@ -4,13 +4,12 @@ from luigi.util import inherits, common_params
 from pathlib import Path
 
 from insar.calc_multilook_values import multilook, calculate_mean_look_values
-from insar.project import ProcConfig
 from insar.constant import SCENE_DATE_FMT
 from insar.logs import STATUS_LOGGER
 from insar.paths.stack import StackPaths
 from insar.paths.slc import SlcPaths
 
-from insar.workflow.luigi.utils import tdir, get_scenes, PathParameter
+from insar.workflow.luigi.utils import tdir, get_scenes, PathParameter, touch_output, DirListingCache, load_proc_config
 from insar.workflow.luigi.stack_setup import InitialSetup
 
 
@@ -27,20 +26,19 @@ class Multilook(luigi.Task):
 
     def output(self):
         return luigi.LocalTarget(
-            tdir(self.workdir) / f"{Path(str(self.slc)).stem}_ml_logs.out"
+            tdir(self.workdir) / f"{Path(self.slc).stem}_ml_logs.out"
         )
 
     def run(self):
         multilook(
             self.workdir,
-            Path(str(self.slc)),
-            Path(str(self.slc_par)),
-            int(str(self.rlks)),
-            int(str(self.alks)),
+            Path(self.slc),
+            Path(self.slc_par),
+            int(self.rlks),
+            int(self.alks),
         )
 
-        with self.output().open("w") as f:
-            f.write("")
+        touch_output(self.output())
 
 
 @inherits(InitialSetup)
@@ -57,8 +55,7 @@ class CreateMultilook(luigi.Task):
         )
 
     def requires(self):
-        with open(self.proc_file, "r") as proc_fileobj:
-            proc = ProcConfig.from_file(proc_fileobj)
+        proc = load_proc_config(self.proc_file)
 
         deps = []
 
@@ -99,8 +96,7 @@ class CreateMultilook(luigi.Task):
     def run(self):
         outdir = Path(self.outdir)
 
-        with open(self.proc_file, "r") as proc_fileobj:
-            proc = ProcConfig.from_file(proc_fileobj)
+        proc = load_proc_config(self.proc_file)
 
         paths = StackPaths(proc)
         primary_pol = proc.polarisation
@@ -111,26 +107,31 @@ class CreateMultilook(luigi.Task):
         # calculate the mean range and azimuth look values
         slc_frames = get_scenes(paths.acquisition_csv)
         slc_par_files = []
+        primary_pol_par_files = []
+        slc_dir_cache = DirListingCache()
+        enabled_pols = frozenset(self.polarization)
 
         for _dt, status_frame, _pols in slc_frames:
             slc_scene = _dt.strftime(SCENE_DATE_FMT)
 
             for _pol in _pols:
-                if _pol not in self.polarization:
+                if _pol not in enabled_pols:
                     log.info(f"Skipping non-primary polarisation {_pol} in multilook for {slc_scene}")
                     continue
 
                 slc_paths = SlcPaths(proc, slc_scene, _pol)
 
-                if not slc_paths.slc_par.exists():
-                    raise FileNotFoundError(f"missing {slc_paths.slc_par} file")
-
                 slc_par_files.append(slc_paths.slc_par)
 
+                if _pol == primary_pol:
+                    primary_pol_par_files.append(slc_paths.slc_par)
+
+        slc_dir_cache.require(slc_par_files)
+
         # range and azimuth looks are only computed from primary polarization
         rlks, alks, *_ = calculate_mean_look_values(
-            [_par for _par in slc_par_files if primary_pol in _par.stem],
-            int(str(self.multi_look)),
+            primary_pol_par_files,
+            int(self.multi_look),
         )
 
         # multi-look jobs run
@@ -1,19 +1,16 @@
 import os
-import re
 from pathlib import Path
 import luigi
 import luigi.configuration
-import pandas as pd
 from luigi.util import requires
 
 from insar.constant import SCENE_DATE_FMT
 from insar.paths.slc import SlcPaths
 from insar.paths.stack import StackPaths
-from insar.project import ProcConfig
 from insar.logs import STATUS_LOGGER
 from insar.process_alos_slc import process_alos_slc
 
-from insar.workflow.luigi.utils import tdir, get_scenes, PathParameter
+from insar.workflow.luigi.utils import tdir, get_scenes, PathParameter, touch_output, load_proc_config, remove_failed_slc_scenes
 from insar.workflow.luigi.stack_setup import InitialSetup
 
 class ProcessALOSSlc(luigi.Task):
@@ -47,8 +44,7 @@ class ProcessALOSSlc(luigi.Task):
         )
         log.info("Beginning SLC processing")
 
-        with open(self.proc_file, "r") as proc_fileobj:
-            proc_config = ProcConfig.from_file(proc_fileobj)
+        proc_config = load_proc_config(self.proc_file)
 
         scene_out_dir = Path(self.slc_dir) / str(self.scene_date)
         scene_out_dir.mkdir(parents=True, exist_ok=True)
@@ -66,8 +62,7 @@ class ProcessALOSSlc(luigi.Task):
 
         log.info("SLC processing complete")
 
-        with self.output().open("w") as f:
-            f.write("")
+        touch_output(self.output())
 
 
 # TODO: Should we have a single "CreateSLCTasks" that supports all sensors instead?
@@ -89,8 +84,7 @@ class CreateALOSSlcTasks(luigi.Task):
         log = STATUS_LOGGER.bind(stack_id=self.stack_id)
         log.info("Create ALOS SLC processing tasks")
 
-        with open(self.proc_file, "r") as proc_fileobj:
-            proc_config = ProcConfig.from_file(proc_fileobj)
+        proc_config = load_proc_config(self.proc_file)
 
         paths = StackPaths(proc_config)
         os.makedirs(paths.slc_dir, exist_ok=True)
@@ -98,12 +92,14 @@ class CreateALOSSlcTasks(luigi.Task):
         slc_frames = get_scenes(paths.acquisition_csv)
 
         slc_tasks = []
+        enabled_pols = frozenset(self.polarization)
+
         for _dt, status_frame, pols in slc_frames:
             slc_scene = _dt.strftime(SCENE_DATE_FMT)
             raw_scene_dir = paths.acquisition_dir / slc_scene
 
             for pol in pols:
-                if pol not in self.polarization:
+                if pol not in enabled_pols:
                     log.info(f"Skipping {pol} scene, only {pols} are enabled")
                     continue
 
@@ -137,27 +133,6 @@ class CreateALOSSlcTasks(luigi.Task):
         yield slc_tasks
 
         # Remove any failed scenes from upstream processing if SLC files fail processing
-        slc_inputs_df = pd.read_csv(paths.acquisition_csv, index_col=0)
-        rewrite = False
-
-        for _slc_task in slc_tasks:
-            with open(_slc_task.output().path) as fid:
-                slc_date = fid.readline().rstrip()
-                if re.match(r"^[0-9]{8}", slc_date):
-                    slc_date = f"{slc_date[0:4]}-{slc_date[4:6]}-{slc_date[6:8]}"
-                    log.info(
-                        f"slc processing failed for scene for {slc_date}: removed from further processing"
-                    )
-                    indexes = slc_inputs_df[slc_inputs_df["date"] == slc_date].index
-                    slc_inputs_df.drop(indexes, inplace=True)
-                    rewrite = True
-
-        # rewrite the csv with removed scenes
-        if rewrite:
-            log.info(
-                f"re-writing the burst data csv files after removing failed slc scenes"
-            )
-            slc_inputs_df.to_csv(paths.acquisition_csv)
-
-        with self.output().open("w") as out_fid:
-            out_fid.write("")
+        remove_failed_slc_scenes(slc_tasks, paths.acquisition_csv, log)
+
+        touch_output(self.output())
@@ -1,6 +1,5 @@
 from pathlib import Path
 import os
-import pandas as pd
 import luigi
 import luigi.configuration
 from luigi.util import common_params
@@ -11,14 +10,14 @@ from insar.paths.slc import SlcPaths
 from insar.paths.interferogram import InterferogramPaths
 from insar.coregister_slc import get_tertiary_coreg_scene
 from insar.process_ifg import validate_ifg_input_files, ProcessIfgException
-from insar.project import ProcConfig, ARDWorkflow
+from insar.project import ARDWorkflow
 from insar.logs import STATUS_LOGGER
 
-from insar.workflow.luigi.utils import DateListParameter, PathParameter, read_primary_date, tdir, read_rlks_alks
+from insar.workflow.luigi.utils import DateListParameter, PathParameter, read_primary_date, tdir, read_rlks_alks, touch_output, get_scene_urls, load_proc_config, find_status_files
 from insar.workflow.luigi.stack_setup import DataDownload
 from insar.workflow.luigi.mosaic import ProcessSlcMosaic
 from insar.workflow.luigi.multilook import Multilook
-from insar.workflow.luigi.coregistration import CreateGammaDem, CoregisterDemPrimary
+from insar.workflow.luigi.coregistration import CreateGammaDem, CoregisterDemPrimary, find_secondaries_lists
 from insar.workflow.luigi.backscatter import CreateCoregisteredBackscatter
 from insar.workflow.luigi.backscatter_nrt import CreateNRTBackscatter
 from insar.workflow.luigi.interferogram import CreateProcessIFGs
@@ -76,8 +75,7 @@ class ReprocessSingleSLC(luigi.Task):
     def get_key_outputs(self):
         workdir = tdir(self.workdir)
 
-        with open(self.proc_file, "r") as proc_fileobj:
-            proc_config = ProcConfig.from_file(proc_fileobj)
+        proc_config = load_proc_config(self.proc_file)
 
         # Read rlks/alks from multilook status
         mlk_status = workdir / f"{self.stack_id}_createmultilook_status_logs.out"
@@ -96,8 +94,7 @@ class ReprocessSingleSLC(luigi.Task):
 
         workdir = tdir(self.workdir)
 
-        with open(self.proc_file, "r") as proc_fileobj:
-            proc_config = ProcConfig.from_file(proc_fileobj)
+        proc_config = load_proc_config(self.proc_file)
 
         paths = StackPaths(proc_config)
 
@@ -109,27 +106,24 @@ class ReprocessSingleSLC(luigi.Task):
         rlks, alks = read_rlks_alks(mlk_status)
 
         # Read scenes CSV and schedule SLC download via URLs
-        slc_inputs_df = pd.read_csv(paths.acquisition_csv, index_col=0)
+        scene_date = str(self.scene_date)
+        scene_urls = get_scene_urls(paths.acquisition_csv).get(scene_date, ())
 
         os.makedirs(paths.acquisition_dir, exist_ok=True)
 
-        download_list = slc_inputs_df.url.unique()
         download_tasks = []
 
-        for slc_url in download_list:
-            url_scene_date = Path(slc_url).name.split("_")[5].split("T")[0]
-
-            if url_scene_date == self.scene_date:
-                download_task = DataDownload(
-                    data_path=slc_url.rstrip(),
-                    polarization=[self.polarization],
-                    poeorb_path=proc_config.poeorb_path,
-                    resorb_path=proc_config.resorb_path,
-                    workdir=self.workdir,
-                    output_dir=paths.acquisition_dir / url_scene_date,
-                )
+        for slc_url in scene_urls:
+            download_task = DataDownload(
+                data_path=slc_url.rstrip(),
+                polarization=[self.polarization],
+                poeorb_path=proc_config.poeorb_path,
+                resorb_path=proc_config.resorb_path,
+                workdir=self.workdir,
+                output_dir=paths.acquisition_dir / scene_date,
+            )
 
-                download_tasks.append(download_task)
+            download_tasks.append(download_task)
 
         if self.progress() is None:
             self.set_progress("download_tasks")
@@ -289,8 +283,7 @@ class ReprocessSingleSLC(luigi.Task):
         if self.progress() != "mli_task":
             raise RuntimeError("Unexpected dynamic dependency error in ReprocessSingleSLC task")
 
-        with self.output().open("w") as f:
-            f.write("")
+        touch_output(self.output())
 
 
 class TriggerResume(luigi.Task):
@@ -339,11 +332,11 @@ class TriggerResume(luigi.Task):
         log = STATUS_LOGGER.bind(outdir=self.outdir, workdir=self.workdir)
 
         outdir = Path(self.outdir)
+        task_dir = tdir(self.workdir)
 
         # Load the gamma proc config file
         proc_path = Path(self.proc_file)
-        with proc_path.open('r') as proc_fileobj:
-            proc_config = ProcConfig.from_file(proc_fileobj)
+        proc_config = load_proc_config(proc_path)
 
         paths = StackPaths(proc_config)
 
@@ -375,8 +368,11 @@ class TriggerResume(luigi.Task):
         # reprocessing of bad/missing coregs and IFGs currently.
 
         # Count number of completed products
-        num_completed_coregs = len(list(tdir(self.workdir).glob("*_coreg_logs.out")))
-        num_completed_ifgs = len(list(tdir(self.workdir).glob("*_ifg_*_status_logs.out")))
+        #
+        # Note: both are counted from a single listing of the task dir
+        status_names = [i.name for i in find_status_files(self.workdir, "_logs.out")]
+        num_completed_coregs = sum(1 for i in status_names if i.endswith("_coreg_logs.out"))
+        num_completed_ifgs = sum(1 for i in status_names if "_ifg_" in i and i.endswith("_status_logs.out"))
 
         log.info(
             f"TriggerResume of workflow {self.workflow} from {num_completed_coregs}x coreg and {num_completed_ifgs}x IFGs",
@@ -400,7 +396,7 @@ class TriggerResume(luigi.Task):
             self.triggered_path().touch()
 
         # Read rlks/alks
-        ml_file = tdir(self.workdir) / f"{self.stack_id}_createmultilook_status_logs.out"
+        ml_file = task_dir / f"{self.stack_id}_createmultilook_status_logs.out"
         if ml_file.exists():
             rlks, alks = read_rlks_alks(ml_file)
 
@@ -418,14 +414,29 @@ class TriggerResume(luigi.Task):
 
             # We need to verify the SLC inputs still exist for these IFGs... if not, reprocess
             reprocessed_single_slcs = []
-            reprocessed_slc_coregs = []
-            reprocessed_slc_backscatter = []
+            reprocessed_slc_coregs = set()
+            reprocessed_slc_backscatter = set()
 
             if self.workflow == ARDWorkflow.Interferogram:
                 # Trigger IFGs resume, this will tell us what pairs are being reprocessed
                 reprocessed_ifgs = ifgs_task.trigger_resume(self.reprocess_failed)
                 log.info("Re-processing IFGs", list=reprocessed_ifgs)
 
+                # Find which secondaries list each scene is in, reading each list once
+                #
+                # Note: the lists are checked in order so a scene maps to its first list,
+                # and as in CoregisterSecondary there's no list index for secondaries1.list
+                secondaries_lists = find_secondaries_lists(outdir / proc_config.list_dir)
+
+                scene_list_idx = {}
+                for list_file_idx, list_file_path in secondaries_lists:
+                    with list_file_path.open("r") as list_file:
+                        for line in list_file:
+                            scene_list_idx.setdefault(line.rstrip("\r\n"), list_file_idx if list_file_idx > 1 else None)
+
+                # The tertiary scene of each scene, as scenes are often in more than one IFG
+                tertiary_scenes = {}
+
                 for primary_date, secondary_date in reprocessed_ifgs:
                     ic = InterferogramPaths(proc_config, primary_date, secondary_date)
 
@@ -435,7 +446,7 @@ class TriggerResume(luigi.Task):
                     except ProcessIfgException as e:
                         pol = proc_config.polarisation
                         status_out = f"{primary_date}_{pol}_{secondary_date}_{pol}_coreg_logs.out"
-                        status_out = tdir(self.workdir) / status_out
+                        status_out = task_dir / status_out
 
                         log.info("Triggering SLC reprocessing as coregistrations missing", missing=e.missing_files)
 
@@ -446,26 +457,17 @@ class TriggerResume(luigi.Task):
                         # contain files besides coreg we don't want to remove. SLC coreg
                         # can be safely re-run over it's existing files deterministically.
 
-                        reprocessed_slc_coregs.append(primary_date)
-                        reprocessed_slc_coregs.append(secondary_date)
+                        reprocessed_slc_coregs.update((primary_date, secondary_date))
 
                         # Add tertiary scene (if any)
-                        for slc_scene in [primary_date, secondary_date]:
-                            list_idx = "-"
-
-                            for list_file_path in (outdir / proc_config.list_dir).glob("secondaries*.list"):
-                                list_file_idx = int(list_file_path.stem[11:])
-
-                                with list_file_path.open('r') as file:
-                                    list_dates = file.read().splitlines()
-
-                                if slc_scene in list_dates:
-                                    if list_file_idx > 1:
-                                        list_idx = list_file_idx
-
-                                    break
-
-                            tertiary_date = get_tertiary_coreg_scene(proc_config, slc_scene, list_idx)
+                        #
+                        # Note: IFG dates are Path objects, the lists hold date strings
+                        for slc_scene in [str(primary_date), str(secondary_date)]:
+                            if slc_scene not in tertiary_scenes:
+                                list_idx = scene_list_idx.get(slc_scene)
+                                tertiary_scenes[slc_scene] = get_tertiary_coreg_scene(proc_config, slc_scene, list_idx)
+
+                            tertiary_date = tertiary_scenes[slc_scene]
                             if tertiary_date:
                                 reprocessed_single_slcs.append(tertiary_date)
 
@@ -474,18 +476,16 @@ class TriggerResume(luigi.Task):
             if coreg_task:
                 triggered_slc_coregs = coreg_task.trigger_resume(reprocessed_slc_coregs, self.reprocess_failed)
                 for primary_date, secondary_date in triggered_slc_coregs:
-                    reprocessed_slc_coregs.append(secondary_date)
+                    reprocessed_slc_coregs.add(secondary_date)
 
                     reprocessed_single_slcs.append(primary_date)
                     reprocessed_single_slcs.append(secondary_date)
 
             triggered_slc_backscatter = backscatter_task.trigger_resume(reprocessed_slc_coregs, self.reprocess_failed)
-            for scene_date in triggered_slc_backscatter:
-                reprocessed_slc_backscatter.append(scene_date)
+            reprocessed_slc_backscatter.update(triggered_slc_backscatter)
 
-            reprocessed_slc_coregs = set(reprocessed_slc_coregs)
-            reprocessed_single_slcs = set(reprocessed_single_slcs) | reprocessed_slc_coregs | set(reprocessed_single_slcs)
-            reprocessed_slc_backscatter = set(reprocessed_slc_backscatter) | reprocessed_single_slcs
+            reprocessed_single_slcs = set(reprocessed_single_slcs) | reprocessed_slc_coregs
+            reprocessed_slc_backscatter |= reprocessed_single_slcs
 
             if len(reprocessed_single_slcs) > 0:
                 # Unfortunately if we're missing SLC coregs, we may also need to reprocess the SLC
@@ -520,12 +520,14 @@ class TriggerResume(luigi.Task):
                         resume_token = self.resume_token
                     )
 
-                    slc_files_exist = all([i.exists() for i in slc_reprocess.get_key_outputs()])
+                    # Note: get_key_outputs reads the proc/multilook files, only do so once
+                    key_outputs = slc_reprocess.get_key_outputs()
+                    slc_files_exist = all(i.exists() for i in key_outputs)
 
                     if slc_files_exist:
                         log.info(
                             f"SLC for {date} already processed",
-                            files=slc_reprocess.get_key_outputs()
+                            files=key_outputs
                         )
                         existing_single_slcs.add(date)
                         continue
@@ -562,5 +564,4 @@ class TriggerResume(luigi.Task):
             log.info("Issuing resumption of standard pipeline tasks")
             yield workflow_task
 
-        with self.output().open("w") as f:
-            f.write("")
+        touch_output(self.output())
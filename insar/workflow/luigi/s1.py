@@ -1,21 +1,17 @@
 import os
-import re
 from pathlib import Path
 import luigi
 import luigi.configuration
-import pandas as pd
 from luigi.util import requires
 
 from insar.constant import SCENE_DATE_FMT
-from insar.project import ProcConfig
 from insar.logs import STATUS_LOGGER
 
-from insar.workflow.luigi.utils import tdir, get_scenes, PathParameter
+from insar.workflow.luigi.utils import tdir, get_scenes, PathParameter, touch_output, load_proc_config, remove_failed_slc_scenes
 from insar.workflow.luigi.stack_setup import InitialSetup
 from insar.paths.stack import StackPaths
 from insar.paths.slc import SlcPaths
 from insar.process_s1_slc import process_s1_slc, process_s1_slc_mosaic
-from insar.stack import load_stack_config
 
 class ProcessSlc(luigi.Task):
     """
@@ -40,7 +36,7 @@ class ProcessSlc(luigi.Task):
         log = STATUS_LOGGER.bind(scene_date=self.scene_date, polarisation=self.polarization)
         log.info("Beginning SLC processing")
 
-        proc_config = load_stack_config(self.proc_file)
+        proc_config = load_proc_config(self.proc_file)
 
         slc_paths = SlcPaths(proc_config, str(self.scene_date), str(self.polarization))
 
@@ -56,8 +52,7 @@ class ProcessSlc(luigi.Task):
 
         log.info("SLC processing complete")
 
-        with self.output().open("w") as f:
-            f.write("")
+        touch_output(self.output())
 
 
 @requires(InitialSetup)
@@ -75,8 +70,7 @@ class CreateFullSlc(luigi.Task):
         log = STATUS_LOGGER.bind(stack_id=self.stack_id)
         log.info("Create full SLC task")
 
-        with open(self.proc_file, "r") as proc_fileobj:
-            proc_config = ProcConfig.from_file(proc_fileobj)
+        proc_config = load_proc_config(self.proc_file)
 
         paths = StackPaths(proc_config)
         os.makedirs(paths.slc_dir, exist_ok=True)
@@ -89,21 +83,24 @@ class CreateFullSlc(luigi.Task):
         resize_primary_scene = None
         resize_primary_pol = None
         for _dt, status_frame, _pols in slc_frames:
+            # Only complete frames can be a reference frame
+            if not status_frame:
+                continue
+
             slc_scene = _dt.strftime(SCENE_DATE_FMT)
             for _pol in _pols:
-                if status_frame:
-                    resize_task = ProcessSlc(
-                        proc_file=self.proc_file,
-                        scene_date=slc_scene,
-                        raw_path=paths.acquisition_dir,
-                        polarization=_pol,
-                        burst_data=paths.acquisition_csv,
-                        slc_dir=paths.slc_dir,
-                        workdir=self.workdir,
-                    )
-                    yield resize_task
-                    resize_primary_tab = paths.slc_dir / slc_scene / f"{slc_scene}_{_pol.upper()}_tab"
-                    break
+                resize_task = ProcessSlc(
+                    proc_file=self.proc_file,
+                    scene_date=slc_scene,
+                    raw_path=paths.acquisition_dir,
+                    polarization=_pol,
+                    burst_data=paths.acquisition_csv,
+                    slc_dir=paths.slc_dir,
+                    workdir=self.workdir,
+                )
+                yield resize_task
+                resize_primary_tab = paths.slc_dir / slc_scene / f"{slc_scene}_{_pol.upper()}_tab"
+                break
             if resize_primary_tab is not None:
                 if resize_primary_tab.exists():
                     resize_primary_scene = slc_scene
@@ -122,10 +119,12 @@ class CreateFullSlc(luigi.Task):
             )
 
         slc_tasks = []
+        enabled_pols = frozenset(self.polarization)
+
         for _dt, status_frame, _pols in slc_frames:
             slc_scene = _dt.strftime(SCENE_DATE_FMT)
             for _pol in _pols:
-                if _pol not in self.polarization:
+                if _pol not in enabled_pols:
                     continue
                 if slc_scene == resize_primary_scene and _pol == resize_primary_pol:
                     continue
@@ -144,29 +143,9 @@ class CreateFullSlc(luigi.Task):
         yield slc_tasks
 
         # Remove any failed scenes from upstream processing if SLC files fail processing
-        slc_inputs_df = pd.read_csv(paths.acquisition_csv, index_col=0)
-        rewrite = False
-        for _slc_task in slc_tasks:
-            with open(_slc_task.output().path) as fid:
-                slc_date = fid.readline().rstrip()
-                if re.match(r"^[0-9]{8}", slc_date):
-                    slc_date = f"{slc_date[0:4]}-{slc_date[4:6]}-{slc_date[6:8]}"
-                    log.info(
-                        f"slc processing failed for scene for {slc_date}: removed from further processing"
-                    )
-                    indexes = slc_inputs_df[slc_inputs_df["date"] == slc_date].index
-                    slc_inputs_df.drop(indexes, inplace=True)
-                    rewrite = True
-
-        # rewrite the csv with removed scenes
-        if rewrite:
-            log.info(
-                f"re-writing the burst data csv files after removing failed slc scenes"
-            )
-            slc_inputs_df.to_csv(paths.acquisition_csv)
+        remove_failed_slc_scenes(slc_tasks, paths.acquisition_csv, log)
 
-        with self.output().open("w") as out_fid:
-            out_fid.write("")
+        touch_output(self.output())
 
 
 class ProcessSlcMosaic(luigi.Task):
@@ -200,7 +179,6 @@ class ProcessSlcMosaic(luigi.Task):
 
         log.info("SLC mosaic complete")
 
-        with self.output().open("w") as f:
-            f.write("")
+        touch_output(self.output())
 
 
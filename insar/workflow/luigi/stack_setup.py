@@ -15,13 +15,15 @@ import structlog
 import insar
 from insar.constant import SCENE_DATE_FMT
 from insar.sensors import identify_data_source, acquire_source_data, S1_ID, RSAT2_ID, PALSAR_ID, TSX_ID
-from insar.project import ProcConfig
 from insar.generate_slc_inputs import query_slc_inputs, slc_inputs
 from insar.logs import STATUS_LOGGER as LOG
 from insar.stack import resolve_stack_scene_additional_files
 from insar.paths.stack import StackPaths
 
-from insar.workflow.luigi.utils import DateListParameter, PathParameter, tdir, simplify_dates, calculate_primary, one_day
+from insar.workflow.luigi.utils import DateListParameter, PathParameter, tdir, simplify_dates, calculate_primary, one_day, touch_output, load_proc_config
+
+# Matches the first run of digits (eg: the relative orbit number in a track name)
+_DIGITS_RE = re.compile(r"\d+")
 
 
 class DataDownload(luigi.Task):
@@ -90,7 +92,7 @@ class DataDownload(luigi.Task):
 
             LOG.info(f"Finished unpacking {self.data_path}")
         except Exception as e:
-            LOG.error(f"Data unpacking failed with exception `{e.message}`", exc_info=True)
+            LOG.error(f"Data unpacking failed with exception `{e}`", exc_info=True)
             failed = True
         finally:
             with self.output().open("w") as f:
@@ -129,8 +131,7 @@ class InitialSetup(luigi.Task):
     def _abort_stack_processing(self, msg: str):
         LOG.info(msg)
 
-        with open(self.proc_file, "r") as proc_file_obj:
-            proc_config = ProcConfig.from_file(proc_file_obj)
+        proc_config = load_proc_config(self.proc_file)
 
         paths = StackPaths(proc_config)
         outdir = Path(proc_config.output_path)
@@ -151,8 +152,7 @@ class InitialSetup(luigi.Task):
     def run(self):
         LOG.info("Initial setup task", sensor=self.sensor)
 
-        with open(self.proc_file, "r") as proc_file_obj:
-            proc_config = ProcConfig.from_file(proc_file_obj)
+        proc_config = load_proc_config(self.proc_file)
 
         paths = StackPaths(proc_config)
         outdir = Path(proc_config.output_path)
@@ -166,7 +166,7 @@ class InitialSetup(luigi.Task):
         if shape_file and proc_config.sensor == "S1":
             # get the relative orbit number, which is int value of the numeric part of the track name
             # Note: This is S1 specific...
-            rel_orbit = int(re.findall(r"\d+", str(proc_config.track))[0])
+            rel_orbit = int(_DIGITS_RE.search(str(proc_config.track)).group(0))
 
             # Convert luigi half-open DateInterval into the inclusive tuple ranges we use
             init_include_dates = [(d.date_a, d.date_b + one_day) for d in self.include_dates or []]
@@ -175,7 +175,7 @@ class InitialSetup(luigi.Task):
             # Find the maximum extent of the queried dates
             include_dates = sorted(simplify_dates(init_include_dates, init_exclude_dates))
             min_date = include_dates[0][0]
-            max_date = max([d[1] for d in include_dates])
+            max_date = max(d[1] for d in include_dates)
 
             LOG.info(
                 "Simplified final include dates",
@@ -211,7 +211,7 @@ class InitialSetup(luigi.Task):
                 return
 
             slc_inputs_df = pd.concat(
-                [slc_inputs(slc_query_results[pol]) for pol in pols],
+                (slc_inputs(slc_query_results[pol]) for pol in pols),
                 ignore_index=True
             )
 
@@ -273,26 +273,37 @@ class InitialSetup(luigi.Task):
 
             # Detect scenes w/ incomplete/bad raw data, and remove those scenes from
             # processing while logging the situation for post-processing analysis.
+            failed_dates = set()
+
             for _task in download_tasks:
-                with open(_task.output().path) as fid:
+                # Note: successful downloads write an empty status file, so those aren't read
+                status_path = _task.output().path
+                if os.stat(status_path).st_size == 0:
+                    continue
+
+                with open(status_path) as fid:
                     failed_file = fid.readline().strip()
-                    if not failed_file:
-                        continue
 
-                    _, _, scene_date = identify_data_source(Path(failed_file))
+                if not failed_file:
+                    continue
 
-                    LOG.info(
-                        f"Corrupted file detected: {failed_file}, removed date {scene_date} from processing",
-                        failed_file=failed_file,
-                        scene_date=scene_date
-                    )
+                _, _, scene_date = identify_data_source(Path(failed_file))
 
-                    if failed_file in additional_scenes:
-                        additional_scenes.remove(failed_file)
-                    else:
-                        scene_date = f"{scene_date[0:4]}-{scene_date[4:6]}-{scene_date[6:8]}"
-                        indexes = slc_inputs_df[slc_inputs_df["date"].astype(str) == scene_date].index
-                        slc_inputs_df.drop(indexes, inplace=True)
+                LOG.info(
+                    f"Corrupted file detected: {failed_file}, removed date {scene_date} from processing",
+                    failed_file=failed_file,
+                    scene_date=scene_date
+                )
+
+                if failed_file in additional_scenes:
+                    additional_scenes.remove(failed_file)
+                else:
+                    failed_dates.add(f"{scene_date[0:4]}-{scene_date[4:6]}-{scene_date[6:8]}")
+
+            # Drop all the failed dates at once (rather than re-indexing per failure)
+            if failed_dates:
+                is_failed = slc_inputs_df["date"].astype(str).isin(failed_dates)
+                slc_inputs_df = slc_inputs_df.loc[~is_failed]
 
         # Add any explicit source data files into the "inputs" data frame
         slc_inputs_df = resolve_stack_scene_additional_files(
@@ -327,7 +338,7 @@ class InitialSetup(luigi.Task):
                 stack_extent = (scene_min, scene_max)
 
         # Write reference scene before we start processing
-        formatted_scene_dates = set([str(dt).replace("-", "") for dt in slc_inputs_df["date"]])
+        formatted_scene_dates = pd.to_datetime(slc_inputs_df["date"]).dt.strftime(SCENE_DATE_FMT).unique()
         ref_scene_date = calculate_primary(formatted_scene_dates)
 
         LOG.info(f"Automatically computed primary reference scene date as {ref_scene_date}")
@@ -337,10 +348,9 @@ class InitialSetup(luigi.Task):
 
         # Write scenes list
         with open(paths.list_dir / 'scenes.list', 'w') as scenes_list_file:
-            scenes_list_file.write('\n'.join(sorted(formatted_scene_dates)))
+            scenes_list_file.writelines(f"{i}\n" for i in sorted(formatted_scene_dates))
 
-        with self.output().open("w") as out_fid:
-            out_fid.write("")
+        touch_output(self.output())
 
         # Update .proc file "auto" reference scene
         if str(proc_config.ref_primary_scene) == "auto":
@@ -349,6 +359,15 @@ class InitialSetup(luigi.Task):
             with open(self.proc_file, "w") as proc_file_obj:
                 proc_config.save(proc_file_obj)
 
+        # Find the common path of our source data, stopping early once it's
+        # been narrowed down to the root (eg: sources from different mounts)
+        source_data_path = download_list[0]
+        for source_path in download_list:
+            source_data_path = os.path.commonpath([source_data_path, source_path])
+
+            if source_data_path in ("", os.sep):
+                break
+
         # Write high level workflow metadata
         _, gamma_version = os.path.split(os.environ["GAMMA_INSTALL_DIR"])[-1].split("-")
         workdir = Path(self.workdir)
@@ -372,7 +391,7 @@ class InitialSetup(luigi.Task):
             "stack_extent": stack_extent,
             "poeorb_path": str(proc_config.poeorb_path),
             "resorb_path": str(proc_config.resorb_path),
-            "source_data_path": str(os.path.commonpath(list(download_list))),
+            "source_data_path": source_data_path,
             "dem_path": str(self.dem_img),
             "primary_ref_scene": ref_scene_date.strftime(SCENE_DATE_FMT),
             "include_dates": [(d1.strftime(SCENE_DATE_FMT), d2.strftime(SCENE_DATE_FMT)) for d1,d2 in init_include_dates],
@@ -388,9 +407,7 @@ class InitialSetup(luigi.Task):
         }
 
         # We write metadata to BOTH work and out dirs
-        with (outdir / "metadata.json").open("w") as file:
-            json.dump(metadata, file, indent=2)
-
-        with (workdir / "metadata.json").open("w") as file:
-            json.dump(metadata, file, indent=2)
+        metadata_json = json.dumps(metadata, indent=2)
+        (outdir / "metadata.json").write_text(metadata_json)
+        (workdir / "metadata.json").write_text(metadata_json)
 
@@ -1,30 +1,96 @@
 import luigi
+import collections
+import copy
 import datetime
+import functools
+import itertools
 import json
+import os
+import re
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 import pandas as pd
 
 from insar.project import ProcConfig
 from insar.constant import SCENE_DATE_FMT
 
+def cached_by_file(maxsize: int):
+    """
+    Caches the results of a function whose first argument is a file path, until
+    that file is modified.
+
+    Many tasks in a stack read the same few files (the .proc file, burst data csv,
+    etc), so their parsed contents are cached per file.  The cache is keyed by the
+    file's path, modification time and size - so a file that's re-written (eg: by
+    an append or resume of the stack) is read again, never served stale.
+    """
+    def decorator(func):
+        @functools.lru_cache(maxsize=maxsize)
+        def cached(path: str, mtime_ns: int, size: int, *args):
+            return func(path, *args)
+
+        @functools.wraps(func)
+        def wrapper(path, *args):
+            stat = os.stat(path)
+            return cached(str(path), stat.st_mtime_ns, stat.st_size, *args)
+
+        wrapper.cache_clear = cached.cache_clear
+        return wrapper
+
+    return decorator
+
 def read_file_line(filepath, line: int):
     """Reads a specific line from a text file"""
     with Path(filepath).open('r') as file:
-        return file.read().splitlines()[line]
+        # Only keep the lines we need in memory, not the whole file
+        if line >= 0:
+            lines = list(itertools.islice(file, line, line + 1))
+        else:
+            lines = collections.deque(file, maxlen=-line)
+
+            if len(lines) < -line:
+                lines = []
+
+        if not lines:
+            raise IndexError(f"Line {line} out of range for file: {filepath}")
+
+        return lines[0].rstrip("\r\n")
+
+
+def format_scene_date(scene_date) -> str:
+    """
+    Formats a scene date as a SCENE_DATE_FMT string, as used in the names of the
+    workflow's products and task status files.
+
+    :param scene_date:
+        The scene date as either a `datetime.date`, a SCENE_DATE_FMT string, or
+        a path whose name is a SCENE_DATE_FMT string (eg: a scene's directory).
+    """
+    if isinstance(scene_date, datetime.date):
+        return scene_date.strftime(SCENE_DATE_FMT)
+
+    if isinstance(scene_date, Path):
+        return scene_date.name
+
+    return str(scene_date)
 
 
 def calculate_primary(scenes_list) -> datetime:
-    slc_dates = [
-        datetime.datetime.strptime(scene.strip(), SCENE_DATE_FMT).date()
-        for scene in scenes_list
-    ]
-    return sorted(slc_dates, reverse=True)[int(len(slc_dates) / 2)]
+    slc_dates = pd.to_datetime(pd.Index(list(scenes_list)).str.strip(), format=SCENE_DATE_FMT)
+    slc_dates = slc_dates.sort_values(ascending=False)
+
+    return slc_dates[len(slc_dates) // 2].date()
 
 
 def read_primary_date(outdir: Path):
-    with (outdir / 'lists' / 'primary_ref_scene').open() as f:
+    return _read_primary_date_cached(Path(outdir) / 'lists' / 'primary_ref_scene')
+
+
+@cached_by_file(maxsize=64)
+def _read_primary_date_cached(primary_ref_scene: str):
+    with open(primary_ref_scene) as f:
         date = f.readline().strip()
 
     return datetime.datetime.strptime(date, SCENE_DATE_FMT).date()
@@ -150,67 +216,329 @@ class DateListParameter(luigi.Parameter):
         return value
 
 
+# The only burst data columns required by get_scenes
+_SCENE_COLUMNS = ["date", "polarization", "swath", "missing_primary_bursts"]
+
+
+def _read_burst_data_columns(burst_data_csv, columns: List[str]) -> Optional[pd.DataFrame]:
+    """
+    Reads just the specified columns of a burst data csv, or returns None if the
+    csv has no rows.
+
+    A stack with no data has an empty (or header only) burst data csv, which has
+    none of the burst data columns.
+    """
+    try:
+        df = pd.read_csv(burst_data_csv, usecols=lambda name: name in columns, dtype=str)
+    except pd.errors.EmptyDataError:
+        return None
+
+    return df if len(df) > 0 else None
+
+
 # TODO: This should take a primary polarisation to filter on
 def get_scenes(burst_data_csv):
-    df = pd.read_csv(burst_data_csv, index_col=0)
-    if len(df) == 0:
+    """
+    Reads the scene dates (and their polarisations) from a stack's burst data csv.
+
+    The result is cached per csv file (invalidated when the file is modified),
+    as many tasks in the workflow query the scenes of the same stack.
+    """
+    return list(_get_scenes_cached(burst_data_csv))
+
+
+@cached_by_file(maxsize=8)
+def _get_scenes_cached(burst_data_csv: str):
+    df = _read_burst_data_columns(burst_data_csv, _SCENE_COLUMNS)
+    if df is None:
+        return ()
+
+    # The polarisations of each date (in order of appearance), sorted by date
+    date_groups = df.groupby("date", sort=True)
+    date_pols = date_groups["polarization"].unique()
+
+    # TODO: This filter should be to primary polarisation
+    # (which is not necessarily the first polarisation of each date)
+    is_first_pol = df["polarization"] == date_groups["polarization"].transform("first")
+    is_iw_swath = df["swath"].isin(["IW1", "IW2", "IW3"])
+    has_missing_bursts = df["missing_primary_bursts"].astype(str).str.strip("][").str.len() > 0
+
+    incomplete_by_date = (is_first_pol & is_iw_swath & has_missing_bursts).groupby(df["date"]).any()
+
+    # HACK: Until we implement https://github.com/GeoscienceAustralia/ga_sar_workflow/issues/200
+    # - this simply refuses to present any scene with missing bursts to the luigi workflow
+    incomplete_dates = incomplete_by_date[incomplete_by_date].index.tolist()
+    assert not incomplete_dates, f"Incomplete frames on dates: {incomplete_dates}"
+
+    scene_dates = pd.to_datetime(date_pols.index, format="%Y-%m-%d").to_pydatetime()
+
+    return tuple((dt, True, polarizations) for dt, polarizations in zip(scene_dates, date_pols))
+
+def touch_output(target: luigi.LocalTarget):
+    """
+    Writes an empty status file for a task's output, marking the task as complete.
+
+    This is a cheaper alternative to `target.open("w")` for outputs that have no
+    content, as an empty file has no need for luigi's atomic temp file + rename.
+    """
+    path = Path(target.path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"")
+
+def write_status(target: luigi.LocalTarget, failed: bool):
+    """
+    Writes a task's status file, marking the task as complete.
+
+    The status file of a failed task holds "FAILED" (so it can be found and
+    reprocessed by a resume), successful tasks write an empty status file.
+    """
+    if not failed:
+        touch_output(target)
+        return
+
+    path = Path(target.path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"FAILED")
+
+# The number of threads used for concurrent file system queries (eg: listing dirs,
+# reading status files), which are latency bound on the network filesystems we run on.
+IO_MAX_WORKERS = 8
+
+def _list_dir_names(path: Path) -> Set[str]:
+    try:
+        with os.scandir(path) as entries:
+            return {i.name for i in entries}
+    except (FileNotFoundError, NotADirectoryError):
+        return set()
+
+class DirListingCache:
+    """
+    Answers file existence queries from a single listing of each file's parent
+    directory, instead of a stat for every file.
+
+    This is only valid for directories which aren't modified while the cache is
+    in use, eg: the outputs of tasks that have already completed.
+    """
+
+    def __init__(self):
+        self._listings = {}
+
+    def exists(self, path: Path) -> bool:
+        path = Path(path)
+        parent = path.parent
+
+        if parent not in self._listings:
+            self._listings[parent] = _list_dir_names(parent)
+
+        return path.name in self._listings[parent]
+
+    def missing(self, paths: List[Path], max_workers: int = IO_MAX_WORKERS) -> List[Path]:
+        """
+        Finds which of the provided paths do not exist.
+
+        The parent directories not yet in the cache are listed concurrently, as on
+        network filesystems the latency of each listing dominates.
+        """
+        paths = [Path(i) for i in paths]
+        new_dirs = list({i.parent for i in paths} - self._listings.keys())
+
+        if new_dirs:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                self._listings.update(zip(new_dirs, pool.map(_list_dir_names, new_dirs)))
+
+        return [i for i in paths if not self.exists(i)]
+
+    def require(self, paths: List[Path]):
+        """
+        Raises a `FileNotFoundError` listing every one of the provided paths which
+        does not exist (if any).
+        """
+        missing = self.missing(paths)
+
+        if missing:
+            raise FileNotFoundError(f"missing {', '.join(str(i) for i in missing)} file(s)")
+
+def get_scene_urls(burst_data_csv) -> Dict[str, Tuple[str]]:
+    """
+    Reads the unique source data URLs of each scene date from a stack's burst data csv.
+
+    As with `get_scenes`, the result is cached per csv file as every scene being
+    reprocessed in a stack needs to look up its URLs from the same csv.
+
+    :returns:
+        A dictionary of URLs, keyed by their scene date (in SCENE_DATE_FMT).
+    """
+    return dict(_get_scene_urls_cached(burst_data_csv))
+
+
+@cached_by_file(maxsize=8)
+def _get_scene_urls_cached(burst_data_csv: str):
+    df = _read_burst_data_columns(burst_data_csv, ["url"])
+    if df is None:
+        return ()
+
+    urls = pd.Series(df["url"].unique())
+
+    # The scene date is the date of the acquisition start time in the (S1) file name,
+    # eg: S1A_IW_SLC__1SDV_20200101T190000_...
+    url_names = urls.str.rsplit("/", n=1).str[-1]
+    url_dates = url_names.str.split("_").str[5].str.split("T").str[0]
+
+    return tuple(
+        (scene_date, tuple(scene_urls))
+        for scene_date, scene_urls in urls.groupby(url_dates, sort=False)
+    )
+
+def find_status_files(workdir, suffix: str) -> List[Path]:
+    """
+    Finds the task status files in a job's task dir whose names end with `suffix`,
+    using a single listing of the directory.
+    """
+    task_dir = tdir(workdir)
+
+    try:
+        with os.scandir(task_dir) as entries:
+            return [task_dir / i.name for i in entries if i.name.endswith(suffix)]
+    except FileNotFoundError:
         return []
 
-    scene_dates = [_dt for _dt in sorted(df.date.unique())]
+def is_failed_status(status_file: Path) -> bool:
+    """
+    Checks if a task status file marks its task as FAILED.
 
-    frames_data = []
+    Status files only ever hold a short status string, so only the head of
+    the file is read to check the first line.  Successful tasks write empty
+    status files, so those are identified from their size without being read.
+    """
+    if os.stat(status_file).st_size == 0:
+        return False
 
-    for _date in scene_dates:
-        df_subset = df[df["date"] == _date]
-        if len(df_subset) == 0:
-            continue
+    with open(status_file, "rb", buffering=0) as file:
+        first_line = file.read(64).split(b"\n", 1)[0]
+
+    return b"FAILED" in first_line
+
+def find_failed_status_files(status_files: List[Path], max_workers: int = IO_MAX_WORKERS) -> Set[Path]:
+    """
+    Finds which of the provided task status files mark their task as FAILED.
 
-        polarizations = df_subset.polarization.unique()
-        # TODO: This filter should be to primary polarisation
-        # (which is not necessarily polarizations[0])
-        df_subset_new = df_subset[df_subset["polarization"] == polarizations[0]]
-        if len(df_subset_new) == 0:
+    The files are read concurrently, as a stack can have thousands of status
+    files and the latency of opening each one dominates.
+    """
+    status_files = list(status_files)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        failed = list(pool.map(is_failed_status, status_files))
+
+    return {i for i, is_failed in zip(status_files, failed) if is_failed}
+
+def write_text_if_changed(path: Path, text: str) -> bool:
+    """
+    Writes a text file, unless it already exists with exactly the same contents.
+
+    This is for files written by tasks which luigi may re-run many times (eg: those
+    that yield dynamic dependencies), so an unchanged file isn't re-written and
+    keeps its modification time.
+
+    :returns:
+        True if the file was written, otherwise False.
+    """
+    path = Path(path)
+
+    try:
+        if path.read_text() == text:
+            return False
+    except FileNotFoundError:
+        pass
+
+    path.write_text(text)
+    return True
+
+# Matches the scene date a failed SLC processing task writes to its status file
+_FAILED_SLC_DATE_RE = re.compile(r"^[0-9]{8}")
+
+def remove_failed_slc_scenes(slc_tasks: List[luigi.Task], burst_data_csv: Path, log) -> Set[str]:
+    """
+    Removes the scenes whose SLC processing tasks failed from a stack's burst data
+    csv, so they're not processed any further.
+
+    A failed SLC task writes its scene date to its status file, while successful
+    tasks write an empty status file (which isn't read).  The burst data csv is
+    only read & re-written if any scenes failed.
+
+    :returns:
+        The set of failed scene dates (in the csv's YYYY-MM-DD format).
+    """
+    failed_dates = set()
+
+    for slc_task in slc_tasks:
+        status_path = slc_task.output().path
+        if os.stat(status_path).st_size == 0:
             continue
 
-        complete_frame = True
-        for swath in [1, 2, 3]:
-            swath_df = df_subset_new[df_subset_new.swath == "IW{}".format(swath)]
-            swath_df = swath_df.sort_values(by="acquisition_datetime", ascending=True)
-            for row in swath_df.itertuples():
-                missing_bursts = row.missing_primary_bursts.strip("][")
-                if missing_bursts:
-                    complete_frame = False
+        with open(status_path) as fid:
+            slc_date = fid.readline().rstrip()
 
-        # HACK: Until we implement https://github.com/GeoscienceAustralia/ga_sar_workflow/issues/200
-        # - this simply refuses to present any scene with missing bursts to the luigi workflow
-        assert(complete_frame)
+        if _FAILED_SLC_DATE_RE.match(slc_date):
+            slc_date = f"{slc_date[0:4]}-{slc_date[4:6]}-{slc_date[6:8]}"
+            log.info(f"slc processing failed for scene for {slc_date}: removed from further processing")
+            failed_dates.add(slc_date)
 
-        dt = datetime.datetime.strptime(_date, "%Y-%m-%d")
-        frames_data.append((dt, complete_frame, polarizations))
+    if failed_dates:
+        log.info("re-writing the burst data csv files after removing failed slc scenes")
+        slc_inputs_df = pd.read_csv(burst_data_csv, index_col=0)
+        slc_inputs_df = slc_inputs_df[~slc_inputs_df["date"].isin(failed_dates)]
+        slc_inputs_df.to_csv(burst_data_csv)
 
-    return frames_data
+    return failed_dates
 
 def mk_clean_dir(path: Path):
     # Clear directory in case it has incomplete data from an interrupted run we've resumed
     path.mkdir(parents=True, exist_ok=True)
 
 def read_rlks_alks(ml_file: Path):
-    with ml_file.open("r") as src:
-        for line in src.readlines():
+    # Many tasks read the same multilook status file, cache it until it changes
+    return _read_rlks_alks_cached(ml_file)
+
+
+@cached_by_file(maxsize=64)
+def _read_rlks_alks_cached(ml_file: str):
+    rlks, alks = None, None
+
+    with open(ml_file, "r") as src:
+        for line in src:
             if line.startswith("rlks"):
                 rlks = int(line.strip().split(":")[1])
             if line.startswith("alks"):
                 alks = int(line.strip().split(":")[1])
 
+            if rlks is not None and alks is not None:
+                break
+
     return rlks, alks
 
 def tdir(workdir):
     return Path(workdir) / 'tasks'
 
+def load_proc_config(proc_file) -> ProcConfig:
+    """
+    Loads a .proc settings file.
+
+    Every task in a stack reads the same .proc file, so the parsed config is
+    cached until the file is modified. Each caller gets its own (shallow) copy
+    of the config, so tasks which modify their config don't affect others.
+    """
+    return copy.copy(_load_proc_config_cached(proc_file))
+
+
+@cached_by_file(maxsize=32)
+def _load_proc_config_cached(proc_file: str) -> ProcConfig:
+    with open(proc_file, "r") as proc_fileobj:
+        return ProcConfig.from_file(proc_fileobj)
+
 def load_settings(proc_file: Path):
     # Load the gamma proc config file
-    with proc_file.open("r") as proc_fileobj:
-        proc_config = ProcConfig.from_file(proc_fileobj)
+    proc_config = load_proc_config(proc_file)
 
     outdir = Path(proc_config.output_path)
 
@@ -13,8 +13,9 @@ HERE = Path(__file__).parent
 
 README = (HERE / "README.md").read_text()
 
+# Note: requirements.txt has comments and blank lines, which aren't requirements
 with (HERE / "requirements.txt").open() as requirement_file:
-    requirements = [r.strip() for r in requirement_file.readlines()]
+    requirements = [r.strip() for r in requirement_file if r.strip() and not r.lstrip().startswith("#")]
 
 setup_requirements = ["pytest-runner"]
 
@@ -106,6 +106,25 @@ def copy_test_proc_into_dir(proc_path, out_dir):
 
     return test_procfile_path
 
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        # Hardlinks aren't possible across devices / on some filesystems
+        shutil.copy2(src, dst)
+
+
+def link_test_data_tree(src_dir, dst_dir):
+    """
+    Stages a copy of a test data directory by hardlinking its files where
+    possible, falling back to a real copy otherwise.
+
+    Only use this for copies whose files get removed/renamed, never modified
+    in place - as those modifications would leak back into the source data.
+    """
+    return shutil.copytree(src_dir, dst_dir, copy_function=_link_or_copy)
+
+
 @pytest.fixture(scope="session")
 def proc_config_path():
     return TEST_DATA_BASE / "20151127" / "gamma.proc"
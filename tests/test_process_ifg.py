@@ -796,7 +796,7 @@ def test_do_geocode(
     assert m_geocode_filtered_ifg.called
 
     assert pg_geocode_mock.data2geotiff.call_count == 5
-    assert remove_mock.call_count == len(const.TEMP_FILE_GLOBS)
+    assert remove_mock.called is False
 
 
 @pytest.mark.skip(reason="Broken test, currently skipping...")
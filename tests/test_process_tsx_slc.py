@@ -2,7 +2,7 @@ import shutil
 
 from insar.process_tsx_slc import process_tsx_slc, ProcessSlcException
 from tests.fixtures import pgp, pgmock, temp_out_dir, test_data_dir, tsx_test_data  # noqa
-from tests.fixtures import TSX_TEST_DATA_SUBDIRS
+from tests.fixtures import TSX_TEST_DATA_SUBDIRS, link_test_data_tree
 import pytest
 
 default_pol = "HH"
@@ -53,7 +53,7 @@ def test_tsx_slc_fails_with_missing_input(pgp, pgmock, temp_out_dir, tsx_test_da
 def test_tsx_slc_fails_with_incomplete_data(pgp, pgmock, temp_out_dir, tsx_test_data, dummy_output_slc):
     # copy test data & avoid modifying the source data
     data_copy = temp_out_dir / "tsx_data_copy"
-    shutil.copytree(tsx_test_data[0], data_copy)
+    link_test_data_tree(tsx_test_data[0], data_copy)
 
     # "Delete" important data from the set, making it incomplete
     scene_date = tsx_test_data[0].name
@@ -131,7 +131,7 @@ def test_s1_swath_data_fails_for_invalid_input(temp_out_dir, pgp, pgmock, loggin
     safe_name = s1_test_data[0].name
     safe_copy = temp_out_dir / safe_name
     safe_copy_zip = safe_copy.with_suffix(".zip")
-    shutil.copytree(s1_test_data[0], safe_copy)
+    link_test_data_tree(s1_test_data[0], safe_copy)
 
     # ... and then invalidate it by deleting an important manifest file
     shutil.rmtree(safe_copy / "annotation")
@@ -169,7 +169,7 @@ def test_rs2_swath_data_fails_for_invalid_input(temp_out_dir, pgp, pgmock, loggi
     # Make a copy of some test data and
     safe_name = Path(rs2_test_data[0].name)
     safe_copy = Path(temp_out_dir / safe_name)
-    shutil.copytree(rs2_test_data[0], safe_copy)
+    link_test_data_tree(rs2_test_data[0], safe_copy)
 
     # Sanity check it's all good by getting swath data (shouldn't except)
     get_data_swath_info(Path(safe_copy))
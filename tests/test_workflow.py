@@ -16,6 +16,9 @@ from insar.paths.interferogram import InterferogramPaths
 from insar.stack import load_stack_scene_dates, load_stack_ifg_pairs
 from insar.paths.stack import StackPaths
 import insar.workflow.luigi.coregistration
+import insar.workflow.luigi.backscatter
+import insar.workflow.luigi.backscatter_nrt
+from insar.workflow.luigi.utils import get_scenes, get_scene_urls, remove_failed_slc_scenes
 
 test_data = Path(__file__).parent.absolute() / 'data'
 rs2_pols = ["HH"]
@@ -1111,3 +1114,124 @@ def test_ard_workflow_query_requiring_missing_orbits_produces_no_scenes(
         expected_scenes=0,
         min_gamma_calls=0
     )
+
+
+def test_get_coreg_date_pairs_multi_level_tree(temp_out_dir):
+    primary_date = "20200105"
+    list_dir = temp_out_dir / "lists"
+    list_dir.mkdir()
+
+    (list_dir / "primary_ref_scene").write_text(primary_date)
+
+    # A 3 level coregistration tree, with a secondary either side of the primary per level
+    tree_levels = [
+        ["20191230", "20200111"],
+        ["20191218", "20200123"],
+        ["20191206", "20200204"],
+    ]
+
+    # Note: the trailing new lines must not be treated as scenes
+    for level, dates in enumerate(tree_levels, 1):
+        (list_dir / f"secondaries{level}.list").write_text("\n".join(dates) + "\n\n")
+
+    proc_config = mock.NonCallableMock()
+    proc_config.list_dir = "lists"
+    proc_config.ref_primary_scene = primary_date
+
+    pairs = insar.workflow.luigi.coregistration.get_coreg_date_pairs(temp_out_dir, proc_config)
+
+    # The first level coregisters to the primary, every other level to the
+    # closest end of the level before it (in tree order).
+    assert pairs == [
+        (primary_date, "20191230"),
+        (primary_date, "20200111"),
+        ("20191230", "20191218"),
+        ("20200111", "20200123"),
+        ("20191218", "20191206"),
+        ("20200123", "20200204"),
+    ]
+
+
+# TriggerResume passes the IFG dates through as Path objects, others pass dates or strings
+@pytest.mark.parametrize("reprocess_date", [Path("20200111"), datetime(2020, 1, 11).date(), "20200111"])
+def test_coregister_secondaries_resume_dependency_dates(temp_out_dir, reprocess_date):
+    task_dir = temp_out_dir / "tasks"
+    task_dir.mkdir()
+
+    reprocessed = task_dir / "20200105_VV_20200111_VV_coreg_logs.out"
+    untouched = task_dir / "20200105_VV_20191230_VV_coreg_logs.out"
+    reprocessed.touch()
+    untouched.touch()
+
+    task = mock.NonCallableMock()
+    task.stack_id = "test_stack"
+    task.workdir = temp_out_dir
+
+    triggered_pairs = insar.workflow.luigi.coregistration.CreateCoregisterSecondaries.trigger_resume(
+        task,
+        {reprocess_date},
+        False
+    )
+
+    assert triggered_pairs == [("20200105", "20200111")]
+    assert not reprocessed.exists()
+    assert untouched.exists()
+
+
+# Note: coregistered backscatter is produced from the 'r' prefixed coregistered MLIs
+@pytest.mark.parametrize("task_class, mli_prefix, status_suffix", [
+    (insar.workflow.luigi.backscatter.CreateCoregisteredBackscatter, "r", "_nbr_logs.out"),
+    (insar.workflow.luigi.backscatter_nrt.CreateNRTBackscatter, "", "_nrt_nbr_logs.out"),
+])
+def test_backscatter_resume_with_path_dates(temp_out_dir, task_class, mli_prefix, status_suffix):
+    task_dir = temp_out_dir / "tasks"
+    task_dir.mkdir()
+
+    reprocessed = task_dir / f"{mli_prefix}20200111_VV_2rlks{status_suffix}"
+    untouched = task_dir / f"{mli_prefix}20191230_VV_2rlks{status_suffix}"
+    reprocessed.touch()
+    untouched.touch()
+
+    task = mock.NonCallableMock()
+    task.stack_id = "test_stack"
+    task.workdir = temp_out_dir
+
+    # TriggerResume passes the reprocessed SLC dates through as Path objects
+    triggered_dates = task_class.trigger_resume(task, {Path("20200111")}, False)
+
+    assert triggered_dates == {"20200111"}
+    assert not reprocessed.exists()
+    assert untouched.exists()
+
+
+def test_get_scenes_of_empty_burst_data(temp_out_dir):
+    # An empty csv is what a stack with no valid scenes is left with
+    empty_csv = temp_out_dir / "empty.csv"
+    empty_csv.touch()
+
+    header_csv = temp_out_dir / "header_only.csv"
+    header_csv.write_text(",date,polarization,swath,missing_primary_bursts,url\n")
+
+    for burst_data_csv in (empty_csv, header_csv):
+        assert get_scenes(burst_data_csv) == []
+        assert get_scene_urls(burst_data_csv) == {}
+
+
+def test_remove_failed_slc_scenes(temp_out_dir):
+    burst_data_csv = temp_out_dir / "burst_data.csv"
+    pd.DataFrame({"date": ["2020-01-05", "2020-01-11"], "url": ["a", "b"]}).to_csv(burst_data_csv)
+
+    # Successful SLC tasks write an empty status, failed tasks write their scene date
+    slc_tasks = []
+    for scene_date, status in [("20200105", ""), ("20200111", "20200111")]:
+        status_path = temp_out_dir / f"{scene_date}_VV_slc_logs.out"
+        status_path.write_text(status)
+
+        task = mock.NonCallableMock()
+        task.output.return_value.path = str(status_path)
+        slc_tasks.append(task)
+
+    failed_dates = remove_failed_slc_scenes(slc_tasks, burst_data_csv, mock.NonCallableMock())
+
+    assert failed_dates == {"2020-01-11"}
+    assert pd.read_csv(burst_data_csv, index_col=0)["date"].tolist() == ["2020-01-05"]